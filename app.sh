@@ -2,4 +2,7 @@
 
 alembic upgrade head
 
-gunicorn app.main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:80
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+gunicorn app.main:app --preload --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:80
@@ -0,0 +1,217 @@
+"""Bulk user import and export.
+
+Import streams CSV or JSONL, validates each row with ``UserImportSchema``,
+hashes passwords on a process pool and writes batches with
+``INSERT ... ON CONFLICT DO NOTHING``. Rows may carry a precomputed
+``hashed_password`` instead of ``password`` when migrating from another system.
+Export streams rows through a server-side cursor.
+
+CLI:
+    python -m app.auth.bulk import users.csv [--format csv|jsonl] [--report errors.jsonl]
+    python -m app.auth.bulk export users.jsonl [--format csv|jsonl]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+from pydantic import ValidationError
+
+from app.auth.models import UserRole
+from app.auth.repositories import UserRepository
+from app.auth.schemas import UserImportSchema
+from app.auth.services import user_cache
+from app.auth.utils import Hasher
+from app.config import settings
+from app.database import async_session_maker, dispose_engine, init_engine
+
+FORMATS = ("csv", "jsonl")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode().rstrip("\r")
+    if buffer:
+        yield buffer.decode().rstrip("\r")
+
+
+async def iter_file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+async def parse_rows(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Yield ``(line_number, row, error)``; exactly one of row and error is set."""
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([line]))
+            continue
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+                raw = dict(zip(header, values))
+            else:
+                raw = json.loads(line)
+                if not isinstance(raw, dict):
+                    raise ValueError("Expected a JSON object")
+            yield line_number, validate_row(raw), None
+        except ValidationError as error:
+            yield line_number, None, format_validation_error(error)
+        except ValueError as error:
+            yield line_number, None, str(error)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    # Never echo the input: the report is returned to the caller and may hold plaintext passwords.
+    return "; ".join(
+        ": ".join(filter(None, (".".join(map(str, detail["loc"])), detail["msg"])))
+        for detail in error.errors(include_url=False, include_context=False, include_input=False)
+    )
+
+
+def validate_row(raw: dict) -> dict:
+    # Empty CSV cells and JSON nulls mean "not given".
+    raw = {key: value for key, value in raw.items() if value not in ("", None)}
+    data = UserImportSchema.model_validate(raw).model_dump()
+    data["email"] = data["email"].lower()
+    if data["password"] is not None:
+        data["hashed_password"] = None
+    return data
+
+
+class UserImporter:
+    def __init__(self, user_repo: UserRepository, batch_size: int, processes: int):
+        self.user_repo = user_repo
+        self.batch_size = batch_size
+        self.processes = processes
+        self.inserted = 0
+        self.errors: list[dict] = []
+
+    async def run(self, lines: AsyncIterable[str], fmt: str) -> dict:
+        batch: list[tuple[int, dict]] = []
+        # Spawn, never fork: the admin endpoint runs this inside a server worker whose
+        # event loop, hasher threads and database sockets must not be copied into children.
+        with ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            async for line_number, row, error in parse_rows(lines, fmt):
+                if error is not None:
+                    self.errors.append({"line": line_number, "error": error})
+                    continue
+                batch.append((line_number, row))
+                if len(batch) >= self.batch_size:
+                    await self._flush(batch, pool)
+                    batch = []
+            if batch:
+                await self._flush(batch, pool)
+        return {"inserted": self.inserted, "failed": len(self.errors), "errors": self.errors}
+
+    async def _flush(self, batch: list[tuple[int, dict]], pool: ProcessPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        to_hash = [row for _, row in batch if row["password"] is not None]
+        hashes = await asyncio.gather(
+            *(loop.run_in_executor(pool, Hasher.get_password_hash, row["password"]) for row in to_hash)
+        )
+        for row, hashed_password in zip(to_hash, hashes):
+            row["hashed_password"] = hashed_password
+        rows = []
+        for _, row in batch:
+            row.pop("password")
+            rows.append(row)
+        inserted = await self.user_repo.bulk_create(rows)
+        self.inserted += len(inserted)
+        for email in inserted:
+            user_cache.delete(email.lower())
+        for line_number, row in batch:
+            # Only the first row of an in-batch duplicate can own the inserted email.
+            if row["email"] in inserted:
+                inserted.discard(row["email"])
+            else:
+                self.errors.append({"line": line_number, "error": "Email or phone number is already taken"})
+
+
+async def import_users(lines: AsyncIterable[str], fmt: str) -> dict:
+    async with async_session_maker() as session:
+        importer = UserImporter(
+            UserRepository(session), settings.BULK_IMPORT_BATCH_SIZE, settings.BULK_IMPORT_PROCESSES
+        )
+        return await importer.run(lines, fmt)
+
+
+def format_rows(rows: Iterable[dict], fmt: str, header: bool) -> str:
+    rows = [
+        {key: value.value if isinstance(value, UserRole) else value for key, value in row.items()}
+        for row in rows
+    ]
+    if fmt == "jsonl":
+        return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[column.key for column in UserRepository.export_columns])
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_users(fmt: str, chunk_rows: int = 500, **filters) -> AsyncIterator[str]:
+    async with async_session_maker() as session:
+        user_repo = UserRepository(session)
+        chunk = []
+        header = True
+        async for row in user_repo.stream_users(settings.BULK_EXPORT_YIELD_PER, **filters):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield format_rows(chunk, fmt, header)
+                chunk, header = [], False
+        if chunk or header:
+            yield format_rows(chunk, fmt, header)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.auth.bulk")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--report", default=None, help="write import errors here as JSONL")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    init_engine()
+    try:
+        return await run_command(args, fmt)
+    finally:
+        await dispose_engine()
+
+
+async def run_command(args: argparse.Namespace, fmt: str) -> int:
+    if args.command == "export":
+        with open(args.path, "w", encoding="utf-8", newline="") as file:
+            async for chunk in export_users(fmt):
+                file.write(chunk)
+        return 0
+
+    report = await import_users(iter_file_lines(args.path), fmt)
+    print(f"inserted {report['inserted']}, failed {report['failed']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            for error in report["errors"]:
+                file.write(json.dumps(error) + "\n")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
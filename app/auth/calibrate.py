@@ -0,0 +1,69 @@
+"""Pick password hash cost parameters for a target latency on this machine.
+
+Usage: python -m app.auth.calibrate [--target-ms 250] [--scheme bcrypt|argon2]
+
+Prints the settings to put in .env. Run it on the hardware that serves logins:
+the cost is a deliberate trade between brute-force resistance and how many
+logins per second each worker can verify.
+"""
+import argparse
+import statistics
+import time
+
+from app.auth.utils import build_crypt_context
+from app.config import settings
+
+
+def measure(context, samples: int = 3) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("Calibrate1")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def calibrate_bcrypt(target_ms: float) -> dict[str, int]:
+    best = 10
+    for rounds in range(10, 17):
+        elapsed = measure(build_crypt_context("bcrypt", bcrypt_rounds=rounds))
+        print(f"bcrypt rounds={rounds}: {elapsed:.0f} ms")
+        if elapsed > target_ms:
+            break
+        best = rounds
+    return {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": best}
+
+
+def calibrate_argon2(target_ms: float, memory_cost: int, parallelism: int) -> dict[str, int | str]:
+    best = 1
+    for time_cost in range(1, 11):
+        context = build_crypt_context(
+            "argon2", argon2_time_cost=time_cost, argon2_memory_cost=memory_cost, argon2_parallelism=parallelism
+        )
+        elapsed = measure(context)
+        print(f"argon2id time_cost={time_cost} memory_cost={memory_cost} parallelism={parallelism}: {elapsed:.0f} ms")
+        if elapsed > target_ms:
+            break
+        best = time_cost
+    return {
+        "PASSWORD_HASH_SCHEME": "argon2",
+        "ARGON2_TIME_COST": best,
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.auth.calibrate")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--scheme", choices=("bcrypt", "argon2"), default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST)
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    args = parser.parse_args()
+    if args.scheme == "bcrypt":
+        result = calibrate_bcrypt(args.target_ms)
+    else:
+        result = calibrate_argon2(args.target_ms, args.memory_cost, args.parallelism)
+    print()
+    for name, value in result.items():
+        print(f"{name}={value}")
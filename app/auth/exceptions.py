@@ -1,4 +1,4 @@
-from app.exceptions import BadRequest, NotAuthenticated
+from app.exceptions import BadRequest, Conflict, NotAuthenticated, NotFound, ServiceUnavailable, TooManyRequests
 
 
 class ErrorCode:
@@ -8,6 +8,11 @@ class ErrorCode:
     PHONE_NUMBER_TAKEN = "Phone number is already taken"
     USER_NOT_EXISTS = "User not exists"
     INCORRECT_PASSWORD = "Incorrect password"
+    HASHING_POOL_SATURATED = "Too many authentication requests, try again later"
+    RATE_LIMIT_EXCEEDED = "Too many attempts, try again later"
+    PROFILING_DISABLED = "Profiling is disabled"
+    PROFILER_BUSY = "A profile is already running on this worker"
+    STREAM_NOT_PAGINATED = "after and limit cannot be combined with stream"
 
 
 class EmailTaken(BadRequest):
@@ -28,3 +33,23 @@ class IncorrectPassword(BadRequest):
 
 class InvalidToken(NotAuthenticated):
     DETAIL = ErrorCode.INVALID_TOKEN
+
+
+class HashingPoolSaturated(ServiceUnavailable):
+    DETAIL = ErrorCode.HASHING_POOL_SATURATED
+
+
+class RateLimitExceeded(TooManyRequests):
+    DETAIL = ErrorCode.RATE_LIMIT_EXCEEDED
+
+
+class StreamNotPaginated(BadRequest):
+    DETAIL = ErrorCode.STREAM_NOT_PAGINATED
+
+
+class ProfilingDisabled(NotFound):
+    DETAIL = ErrorCode.PROFILING_DISABLED
+
+
+class ProfilerBusy(Conflict):
+    DETAIL = ErrorCode.PROFILER_BUSY
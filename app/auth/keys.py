@@ -0,0 +1,107 @@
+import functools
+import json
+import pathlib
+import sys
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+
+from app.config import settings
+
+
+class KeyRing:
+    """Signing and verification keys for access tokens.
+
+    Keys are parsed into their final form once, so encoding and decoding skip
+    PEM parsing and algorithm lookup on every call.
+
+    For HS* algorithms the shared ``SECRET`` is used and nothing is published.
+    For asymmetric algorithms every ``<kid>.pem`` private key in ``keys_dir`` is
+    accepted for verification and published in the JWKS, while only
+    ``active_kid`` signs. Rotation: add the new key file first so it shows up in
+    the JWKS, then switch ``JWT_ACTIVE_KID`` to it, and delete the old file once
+    tokens signed with it have expired.
+    """
+
+    def __init__(self, algorithm: str, secret: str, keys_dir: str | None = None, active_kid: str | None = None):
+        self.algorithm = algorithm
+        self.symmetric = algorithm.startswith("HS")
+        # Symmetric tokens carry no kid: the one shared secret is stored under None.
+        self.active_kid = None if self.symmetric else active_kid
+        self.private_keys = {}
+        self.public_keys = {}
+        self._algorithm = get_default_algorithms()[algorithm]
+        if self.symmetric:
+            self.private_keys[None] = self.public_keys[None] = self._algorithm.prepare_key(secret)
+            return
+        if keys_dir is None or active_kid is None:
+            raise ValueError(f"{algorithm} requires JWT_KEYS_DIR and JWT_ACTIVE_KID")
+        for path in sorted(pathlib.Path(keys_dir).glob("*.pem")):
+            private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            self.private_keys[path.stem] = private_key
+            self.public_keys[path.stem] = private_key.public_key()
+        if active_kid not in self.private_keys:
+            raise ValueError(f"No key file for active kid {active_kid} in {keys_dir}")
+
+    def encode(self, claims: dict) -> str:
+        headers = None if self.symmetric else {"kid": self.active_kid}
+        return jwt.encode(claims, self.private_keys[self.active_kid], algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str, verify_exp: bool = True) -> dict:
+        if self.symmetric:
+            key = self.public_keys[None]
+        else:
+            # The kid only selects the key; jwt.decode still checks alg and the signature.
+            key = self.public_keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise jwt.InvalidKeyError("Unknown key id")
+        options = None if verify_exp else {"verify_exp": False}
+        return jwt.decode(token, key, algorithms=[self.algorithm], options=options)
+
+    def jwks(self) -> dict:
+        keys = []
+        if not self.symmetric:
+            for kid, key in self.public_keys.items():
+                jwk = self._algorithm.to_jwk(key, as_dict=True)
+                keys.append({**jwk, "kid": kid, "alg": self.algorithm, "use": "sig"})
+        return {"keys": keys}
+
+
+def generate_key(keys_dir: str, algorithm: str) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    curves = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+    if algorithm in curves:
+        private_key = ec.generate_private_key(curves[algorithm]())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm.startswith(("RS", "PS")):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Cannot generate keys for {algorithm}")
+    kid = uuid.uuid4().hex[:16]
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    path = pathlib.Path(keys_dir) / f"{kid}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pem)
+    path.chmod(0o600)
+    return kid
+
+
+@functools.cache
+def get_key_ring() -> KeyRing:
+    return KeyRing(settings.ALGORITHM, settings.SECRET, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
+
+@functools.cache
+def get_jwks_body() -> bytes:
+    return json.dumps(get_key_ring().jwks()).encode()
+
+
+if __name__ == "__main__":
+    # python -m app.auth.keys <keys_dir> [algorithm]
+    print(generate_key(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "ES256"))
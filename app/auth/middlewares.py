@@ -1,49 +1,97 @@
-import datetime
-from typing import Callable
+import logging
+import time
 
-from fastapi import Request, Response
+from fastapi import Response
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.auth.repositories import UserRepository
 from app.auth.services import UserService
+from app.auth.utils import Hasher
+from app.config import settings
 from app.database import async_session_maker
 
+logger = logging.getLogger(__name__)
 
-async def refresh_tokens_middleware(
-    request: Request,
-    call_next: Callable[[Request], Response],
-) -> Response:
-    session = async_session_maker()
-    user_repo = UserRepository(session)
-    user_service = UserService(user_repo)
-    access_token = request.cookies.get("ACCESS_TOKEN")
-    if access_token is not None:
-        access_token_data = user_service.parse_token(access_token)
-        if access_token_data["exp"] > datetime.datetime.now().timestamp():
-            return await call_next(request)
-
-    refresh_token = request.cookies.get("REFRESH_TOKEN")
-    if not refresh_token:
-        return await call_next(request)
-
-    refresh_token_data = await user_service.get_refresh_token(refresh_token)
-    if not refresh_token_data:
-        return await call_next(request)
-
-    user = await user_service.get_by_id(refresh_token_data.user_id)
-    if not user:
-        return await call_next(request)
-
-    new_tokens = await user_service.generate_tokens(user)
-    access_token = new_tokens["access_token"]
-    refresh_token = new_tokens["refresh_token"]
-    request.cookies.pop("REFRESH_TOKEN")
-    # request.cookies.pop("ACCESS_TOKEN")
-    new_cookies = {
-        "ACCESS_TOKEN": new_tokens["access_token"],
-        "REFRESH_TOKEN": new_tokens["refresh_token"]
-    }
-    request.cookies.update(**new_cookies)
-    print(request.cookies)
-    response = await call_next(request)
-    user_service.set_login_cookie(response, access_token, refresh_token)
-    return response
+
+class SlidingSessionMiddleware:
+    """Rotate the session cookies shortly before the access token expires.
+
+    Requests whose access token is valid for longer than ``refresh_window``
+    seconds, and requests to public paths, pass straight through without a
+    database session. Otherwise the refresh token is rotated, the request is
+    forwarded with the new access token and the response carries the new
+    cookies, so clients never see a 401 followed by an explicit refresh.
+    """
+
+    public_paths = (
+        "/auth/login",
+        "/auth/register",
+        "/auth/refresh",
+        "/auth/logout",
+        "/.well-known/",
+        "/metrics",
+        "/docs",
+        "/redoc",
+        "/openapi.json",
+    )
+
+    def __init__(self, app: ASGIApp, refresh_window: int = settings.SESSION_REFRESH_WINDOW):
+        self.app = app
+        self.refresh_window = refresh_window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.public_paths):
+            await self.app(scope, receive, send)
+            return
+
+        cookies = self._get_cookies(scope)
+        refresh_token = cookies.get("REFRESH_TOKEN")
+        if not refresh_token or not self._needs_refresh(cookies.get("ACCESS_TOKEN")):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with async_session_maker() as session:
+                new_tokens = await UserService(UserRepository(session)).rotate_tokens(refresh_token)
+        except Exception:
+            # A failed refresh must not fail the request: the current access token may still be valid.
+            logger.exception("Sliding session refresh failed")
+            new_tokens = None
+        if not new_tokens:
+            await self.app(scope, receive, send)
+            return
+
+        cookies["ACCESS_TOKEN"] = new_tokens["access_token"]
+        cookies["REFRESH_TOKEN"] = new_tokens["refresh_token"]
+        # Rewrite in place: outer middleware reads values (e.g. the matched route) back from this scope.
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name != b"cookie"
+        ] + [(b"cookie", "; ".join(f"{name}={value}" for name, value in cookies.items()).encode())]
+
+        cookie_response = Response()
+        UserService.set_login_cookie(cookie_response, **new_tokens)
+        set_cookie_headers = [header for header in cookie_response.raw_headers if header[0] == b"set-cookie"]
+
+        async def send_with_cookies(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + set_cookie_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookies)
+
+    def _needs_refresh(self, access_token: str | None) -> bool:
+        if not access_token:
+            return True
+        # Expired tokens are refreshed; revoked, forged and malformed ones are not.
+        token_data = Hasher.parse_token(access_token, verify_exp=False)
+        if token_data is None or token_data["exp"] is None:
+            return False
+        return token_data["exp"] - time.time() <= self.refresh_window
+
+    @staticmethod
+    def _get_cookies(scope: Scope) -> dict[str, str]:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                return cookie_parser(value.decode("latin-1"))
+        return {}
@@ -2,7 +2,7 @@ import datetime
 import uuid
 import enum
 
-from sqlalchemy import Boolean, ForeignKey, String, Enum
+from sqlalchemy import JSON, BigInteger, Boolean, ForeignKey, Index, Integer, String, Enum, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base, uuid_pk
@@ -18,7 +18,7 @@ class User(Base):
     __tablename__ = "auth_user"
 
     id: Mapped[uuid_pk]
-    email: Mapped[str] = mapped_column(String(length=320), unique=True, index=True, nullable=False)
+    email: Mapped[str] = mapped_column(String(length=320), nullable=False)
     phone_number: Mapped[str] = mapped_column(unique=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(length=1024), nullable=False)
     role: Mapped[UserRole]
@@ -26,11 +26,42 @@ class User(Base):
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        Index("ix_auth_user_email_lower", func.lower(email), unique=True),
+    )
+
 
 class RefreshToken(Base):
+    # Daily range partitions on expires_at, managed by UserRepository.maintain_refresh_token_partitions.
     __tablename__ = "refresh_token"
+    __table_args__ = (
+        Index("ix_refresh_token_user_id_expires_at", "user_id", "expires_at"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
 
     id: Mapped[uuid_pk]
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("auth_user.id", ondelete="cascade"))
-    token: Mapped[str]
+    token_hash: Mapped[str] = mapped_column(String(length=64), index=True)
+    expires_at: Mapped[datetime.datetime] = mapped_column(primary_key=True)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+
+    jti: Mapped[str] = mapped_column(String(length=64), primary_key=True)
     expires_at: Mapped[datetime.datetime]
+    revoked_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), index=True)
+
+
+class OutboxEvent(Base):
+    # Written in the same transaction as the change it describes; drained by app.auth.outbox.
+    __tablename__ = "auth_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(length=64))
+    user_id: Mapped[uuid.UUID | None]
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    created_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.now)
+    attempts: Mapped[int] = mapped_column(default=0)
+    # None once delivery has been given up on; such rows stay for inspection.
+    next_attempt_at: Mapped[datetime.datetime | None] = mapped_column(default=datetime.datetime.now, index=True)
@@ -0,0 +1,164 @@
+"""Delivery of auth events from the ``auth_outbox`` table.
+
+``UserRepository`` records an event in the same transaction as the change it
+describes; nothing else happens on the request path. Changes that never touch
+the database have no event: with an external ``TOKEN_STORE`` that means
+logins (``session.started``) and refreshes (``session.refreshed``), which
+would otherwise each cost a write on the primary. ``OutboxDispatcher``
+drains the table in batches of at most ``OUTBOX_BATCH_SIZE`` rows and hands
+each batch to every configured sink. Delivery is at least once: a batch that
+fails in any sink is retried as a whole with exponential backoff, so sinks
+should deduplicate on the event ``id``.
+"""
+import abc
+import asyncio
+import json
+import logging
+import random
+
+from app.auth.models import OutboxEvent
+from app.auth.repositories import UserRepository
+from app.config import settings
+from app.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+
+def event_message(event: OutboxEvent) -> dict:
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "user_id": str(event.user_id) if event.user_id else None,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat(),
+    }
+
+
+class EventSink(abc.ABC):
+    """Destination for batches of event messages; raise to have the batch retried."""
+
+    @abc.abstractmethod
+    async def send(self, messages: list[dict]) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class LogSink(EventSink):
+    """Append events to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send(self, messages: list[dict]) -> None:
+        lines = "".join(json.dumps(message) + "\n" for message in messages)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: str) -> None:
+        # One write per batch; O_APPEND keeps lines from several workers whole.
+        with open(self.path, "a") as file:
+            file.write(lines)
+
+
+class WebhookSink(EventSink):
+    """POST each batch as ``{"events": [...]}``; any non-2xx response fails the batch."""
+
+    def __init__(self, url: str, timeout: float = settings.OUTBOX_WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._client = None
+
+    async def send(self, messages: list[dict]) -> None:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        response = await self._client.post(self.url, json={"events": messages})
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class QueueSink(EventSink):
+    """Bounded in-process queue, a stand-in for a message broker.
+
+    A batch is accepted whole or not at all: when the queue cannot take it the
+    events stay in the outbox instead of growing memory.
+    """
+
+    def __init__(self, maxsize: int = settings.OUTBOX_QUEUE_SIZE):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+
+    async def send(self, messages: list[dict]) -> None:
+        if self.queue.maxsize - self.queue.qsize() < len(messages):
+            raise asyncio.QueueFull
+        for message in messages:
+            self.queue.put_nowait(message)
+
+
+def build_event_sink(kind: str) -> EventSink:
+    if kind == "log":
+        return LogSink(settings.OUTBOX_LOG_PATH)
+    if kind == "webhook":
+        if not settings.OUTBOX_WEBHOOK_URL:
+            raise ValueError("OUTBOX_WEBHOOK_URL is required for the webhook event sink")
+        return WebhookSink(settings.OUTBOX_WEBHOOK_URL)
+    if kind == "queue":
+        return QueueSink()
+    raise ValueError(f"Unknown event sink: {kind}")
+
+
+class OutboxDispatcher:
+    def __init__(
+            self,
+            sinks: list[EventSink],
+            batch_size: int = settings.OUTBOX_BATCH_SIZE,
+            max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+            backoff_base: float = settings.OUTBOX_BACKOFF_BASE,
+            backoff_max: float = settings.OUTBOX_BACKOFF_MAX,
+    ):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def backoff(self, attempts: int) -> float | None:
+        """Seconds before the next attempt after ``attempts`` failures, or None to give up."""
+        if attempts >= self.max_attempts:
+            return None
+        # Full jitter, so workers retrying the same outage do not hit the sink in lockstep.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempts))
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch and return how many events were claimed."""
+        async with async_session_maker() as session:
+            repository = UserRepository(session)
+            events = await repository.claim_outbox_events(self.batch_size)
+            if not events:
+                return 0
+            messages = [event_message(event) for event in events]
+            try:
+                for sink in self.sinks:
+                    await sink.send(messages)
+            except Exception:
+                logger.exception("Delivering %d auth events failed", len(events))
+                delays = [self.backoff(event.attempts + 1) for event in events]
+                await repository.retry_outbox_events(events, delays)
+                parked = delays.count(None)
+                if parked:
+                    logger.error("Gave up on %d auth events after %d attempts", parked, self.max_attempts)
+            else:
+                await repository.complete_outbox_events([event.id for event in events])
+            return len(events)
+
+    async def close(self) -> None:
+        for sink in self.sinks:
+            await sink.close()
+
+
+event_dispatcher = OutboxDispatcher([build_event_sink(kind) for kind in settings.OUTBOX_SINKS])
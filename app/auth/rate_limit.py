@@ -0,0 +1,120 @@
+import abc
+import math
+import time
+
+from fastapi import Request
+
+from app.auth.exceptions import RateLimitExceeded
+from app.config import settings
+
+
+class RateLimiter(abc.ABC):
+    """Sliding-window counter: the previous fixed window's count is weighted by
+    how much of it still overlaps the sliding window, so two counters per key
+    approximate a true sliding log.
+    """
+
+    @abc.abstractmethod
+    async def _hit(self, key: str, limit: int, window: int, window_id: int, weight: float) -> tuple[bool, int, int]:
+        """Count a request unless over the limit; return (allowed, current, previous)."""
+
+    async def hit(self, key: str, limit: int, window: int) -> int:
+        """Register a request; return 0 if allowed, otherwise seconds to wait."""
+        now = time.time()
+        window_id, offset = divmod(now, window)
+        weight = 1 - offset / window
+        allowed, current, previous = await self._hit(key, limit, window, int(window_id), weight)
+        if allowed:
+            return 0
+        if current >= limit or previous == 0:
+            wait = window - offset
+        else:
+            # Wait until the previous window's weighted share drops below the remaining budget.
+            wait = (1 - (limit - current) / previous) * window - offset
+        return max(math.ceil(wait), 1)
+
+
+class MemoryRateLimiter(RateLimiter):
+    def __init__(self, prune_every: int = 10000):
+        self._counters: dict[str, tuple[int, int, int]] = {}
+        self._prune_every = prune_every
+        self._hits = 0
+
+    async def _hit(self, key: str, limit: int, window: int, window_id: int, weight: float) -> tuple[bool, int, int]:
+        stored_id, current, previous = self._counters.get(key, (window_id, 0, 0))
+        if stored_id != window_id:
+            previous = current if stored_id == window_id - 1 else 0
+            current = 0
+        allowed = previous * weight + current < limit
+        if allowed:
+            current += 1
+        self._counters[key] = (window_id, current, previous)
+        self._hits += 1
+        if self._hits % self._prune_every == 0:
+            self._prune(window_id)
+        return allowed, current, previous
+
+    def _prune(self, window_id: int) -> None:
+        stale = [key for key, (stored_id, _, _) in self._counters.items() if stored_id < window_id - 1]
+        for key in stale:
+            del self._counters[key]
+
+
+class RedisRateLimiter(RateLimiter):
+    key_prefix = "rate_limit:"
+    hit_script = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+    if previous * tonumber(ARGV[2]) + current >= tonumber(ARGV[1]) then
+        return {0, current, previous}
+    end
+    current = redis.call('INCR', KEYS[1])
+    if current == 1 then
+        redis.call('EXPIRE', KEYS[1], ARGV[3] * 2)
+    end
+    return {1, current, previous}
+    """
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+
+        self.client = aioredis.from_url(url)
+        self._hit_script = self.client.register_script(self.hit_script)
+
+    async def _hit(self, key: str, limit: int, window: int, window_id: int, weight: float) -> tuple[bool, int, int]:
+        allowed, current, previous = await self._hit_script(
+            keys=[f"{self.key_prefix}{key}:{window_id}", f"{self.key_prefix}{key}:{window_id - 1}"],
+            args=[limit, weight, window],
+        )
+        return bool(allowed), int(current), int(previous)
+
+
+def build_rate_limiter(backend: str) -> RateLimiter:
+    if backend == "memory":
+        return MemoryRateLimiter()
+    if backend == "redis":
+        return RedisRateLimiter(settings.REDIS_URL)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+rate_limiter = build_rate_limiter(settings.RATE_LIMIT_BACKEND)
+
+
+async def check_rate_limit(key: str, limit: int) -> None:
+    if limit <= 0:
+        return
+    retry_after = await rate_limiter.hit(key, limit, settings.RATE_LIMIT_WINDOW)
+    if retry_after:
+        raise RateLimitExceeded(retry_after)
+
+
+def limit_per_ip(scope: str, limit: int):
+    async def dependency(request: Request) -> None:
+        client_ip = request.client.host if request.client else "unknown"
+        await check_rate_limit(f"{scope}:ip:{client_ip}", limit)
+
+    return dependency
+
+
+async def limit_per_account(scope: str, email: str, limit: int) -> None:
+    await check_rate_limit(f"{scope}:account:{email.lower()}", limit)
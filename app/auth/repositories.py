@@ -1,65 +1,403 @@
 import datetime
+import uuid
+from typing import AsyncIterator
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import Select, delete, func, select
+from sqlalchemy import Select, delete, func, insert, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.models import RefreshToken, User
-from app.database import get_async_session
+from app.auth.cache import TTLCache
+from app.auth.exceptions import EmailTaken, PhoneNumberTaken
+from app.auth.models import OutboxEvent, RefreshToken, RevokedToken, User, UserRole
+from app.auth.token_store import TokenStore, token_store
+from app.auth.utils import Hasher
+from app.config import settings
+from app.database import RoutingSession, get_async_session
+from app.metrics import instrument_queries
+from app.tracing import trace_methods
 
+# Users written by this worker in the last few seconds; their reads skip the replicas.
+sticky_reads = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.DB_REPLICA_STICKY_SECONDS)
 
+
+@trace_methods
+@instrument_queries
 class UserRepository:
     user_table = User
     refresh_token_table = RefreshToken
+    revoked_token_table = RevokedToken
+    outbox_table = OutboxEvent
+    refresh_token_lifetime = datetime.timedelta(days=7)
+    token_store: TokenStore | None = token_store
+    sticky_reads = sticky_reads
+    unique_violations = {"email": EmailTaken, "phone_number": PhoneNumberTaken}
+    export_columns = (
+        User.id, User.email, User.phone_number, User.role, User.is_active, User.is_verified, User.is_superuser
+    )
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get_by_id(self, id: UUID) -> User | None:
         statement = select(self.user_table).where(self.user_table.id == id)
-        return await self._get_user(statement)
+        return await self._read_user(statement, id)
 
-    async def get_all(self) -> list[User]:
-        statement = select(self.user_table)
-        result = await self.session.execute(statement)
-        return result.scalars()
+    async def list_users(self, after: UUID | None = None, limit: int = 100, **filters) -> list[dict]:
+        """Return one keyset page of projected user rows ordered by id."""
+        statement = (
+            select(*self.export_columns)
+            .where(*self._user_filters(**filters))
+            .order_by(self.user_table.id)
+            .limit(limit)
+        )
+        if after is not None:
+            statement = statement.where(self.user_table.id > after)
+        result = await self.session.execute(self._on_replica(statement))
+        return [row._asdict() for row in result]
 
     async def get_by_email(self, email: str) -> User | None:
         statement = select(self.user_table).where(
-            func.lower(self.user_table.email) == func.lower(email)
+            func.lower(self.user_table.email) == email.lower()
         )
-        return await self._get_user(statement)
+        return await self._read_user(statement, email.lower())
+
+    async def get_profile_by_email(self, email: str) -> dict | None:
+        """Return the ``export_columns`` of a user as a mapping, without building an ORM entity."""
+        statement = select(*self.export_columns).where(
+            func.lower(self.user_table.email) == email.lower()
+        )
+        replica_statement = self._on_replica(statement, email.lower())
+        row = (await self.session.execute(replica_statement)).mappings().one_or_none()
+        if row is None and replica_statement is not statement:
+            row = (await self.session.execute(statement)).mappings().one_or_none()
+        return row
 
     async def get_by_phone_number(self, phone_number: str) -> User | None:
         statement = select(self.user_table).where(
             self.user_table.phone_number == phone_number
         )
-        return await self._get_user(statement)
+        return await self._read_user(statement, phone_number)
 
     async def create(self, create_dict: dict) -> User:
-        user = self.user_table(**create_dict)
-        self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        """Insert a user with a single ``INSERT ... RETURNING``.
+
+        Duplicates are detected by the unique constraints rather than by prior
+        lookups, so concurrent sign-ups cannot both succeed.
+        """
+        statement = insert(self.user_table).values(**create_dict).returning(self.user_table)
+        try:
+            user = (await self.session.scalars(statement)).one()
+            self._record_event("user.registered", user.id, email=user.email)
+            await self.session.commit()
+        except IntegrityError as error:
+            await self.session.rollback()
+            violated = self._violated_constraint(error)
+            for column, exception in self.unique_violations.items():
+                if column in violated:
+                    raise exception from error
+            raise
+        self._stick(user.id, user.email.lower(), user.phone_number)
         return user
 
-    async def add_refresh_token(self, user_id: int, token: str) -> None:
+    async def update_password_hash(self, user_id: UUID, hashed_password: str) -> None:
+        statement = (
+            update(self.user_table)
+            .where(self.user_table.id == user_id)
+            .values(hashed_password=hashed_password)
+        )
+        await self.session.execute(statement)
+        await self.session.commit()
+
+    async def bulk_create(self, rows: list[dict]) -> set[str]:
+        """Insert a batch of users, skipping rows that hit a unique constraint.
+
+        Returns the emails that were actually inserted; each of them gets a
+        ``user.registered`` event in the same transaction.
+        """
+        statement = (
+            pg_insert(self.user_table)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(self.user_table.id, self.user_table.email)
+        )
+        result = await self.session.execute(statement)
+        inserted = set()
+        for user_id, email in result:
+            self._record_event("user.registered", user_id, email=email)
+            inserted.add(email)
+        await self.session.commit()
+        return inserted
+
+    async def stream_users(self, yield_per: int = 1000, **filters) -> AsyncIterator[dict]:
+        statement = (
+            select(*self.export_columns)
+            .where(*self._user_filters(**filters))
+            .order_by(self.user_table.id)
+            .execution_options(yield_per=yield_per)
+        )
+        result = await self.session.stream(self._on_replica(statement))
+        async for row in result:
+            yield row._asdict()
+
+    async def add_refresh_token(self, user_id: UUID, token: str) -> None:
+        if self.token_store is not None:
+            # No database write to attach an event to; see app.auth.outbox.
+            await self.token_store.add(Hasher.hash_token(token), user_id, self.refresh_token_lifetime)
+            return
         refresh_token = self.refresh_token_table()
-        refresh_token.token = token
+        refresh_token.token_hash = Hasher.hash_token(token)
         refresh_token.user_id = user_id
-        refresh_token.expires_at = datetime.datetime.now() + datetime.timedelta(days=7)
+        refresh_token.expires_at = datetime.datetime.now() + self.refresh_token_lifetime
         self.session.add(refresh_token)
+        self._record_event("session.started", user_id)
         await self.session.commit()
 
-    async def get_refresh_token(self, refresh_token: str) -> RefreshToken | None:
-        statement = select(self.refresh_token_table).where(
-            self.refresh_token_table.token == refresh_token
+    async def rotate_refresh_token(self, refresh_token: str, new_refresh_token: str) -> dict | None:
+        """Consume an unexpired refresh token and store its successor in one statement.
+
+        Issues ``WITH consumed AS (DELETE ... RETURNING user_id), successor AS
+        (INSERT ... SELECT ... RETURNING user_id) SELECT ... FROM successor JOIN users``,
+        so of two concurrent rotations of the same token only one gets a row back,
+        and the claims for the new access token need no second query.
+        Returns the owner's ``id``, ``email`` and ``role``, or None if the token
+        is unknown or expired.
+        """
+        if self.token_store is not None:
+            user_id = await self.token_store.rotate(
+                Hasher.hash_token(refresh_token), Hasher.hash_token(new_refresh_token), self.refresh_token_lifetime
+            )
+            if user_id is None:
+                return None
+            self._stick(user_id)
+            # The store keeps only the owner's id; read the claims from the primary.
+            user = await self.get_by_id(user_id)
+            return None if user is None else {"id": user.id, "email": user.email, "role": user.role}
+        table = self.refresh_token_table
+        now = datetime.datetime.now()
+        consumed = (
+            delete(table)
+            .where(table.token_hash == Hasher.hash_token(refresh_token), table.expires_at > now)
+            .returning(table.user_id)
+            .cte("consumed")
+        )
+        successor = (
+            insert(table)
+            .from_select(
+                [table.id, table.user_id, table.token_hash, table.expires_at],
+                select(
+                    literal(uuid.uuid4()),
+                    consumed.c.user_id,
+                    literal(Hasher.hash_token(new_refresh_token)),
+                    literal(now + self.refresh_token_lifetime),
+                ),
+            )
+            .returning(table.user_id)
+            .cte("successor")
+        )
+        statement = select(self.user_table.id, self.user_table.email, self.user_table.role).join(
+            successor, successor.c.user_id == self.user_table.id
         )
         result = await self.session.execute(statement)
-        statement = delete(self.refresh_token_table).where(self.refresh_token_table.token == refresh_token)
-        await self.session.execute(statement)
-        return result.unique().scalar_one_or_none()
+        user = result.mappings().one_or_none()
+        if user is not None:
+            self._record_event("session.refreshed", user["id"])
+        await self.session.commit()
+        if user is None:
+            return None
+        self._stick(user["id"])
+        return dict(user)
+
+    async def maintain_refresh_token_partitions(
+            self, days_ahead: int = 10, lock_timeout: str = "2s"
+    ) -> tuple[list[str], list[str]]:
+        """Create the daily ``refresh_token`` partitions for the next ``days_ahead`` days
+        and drop those whose whole range has expired.
+
+        Dropping a partition replaces row-by-row deletes of expired tokens, so the
+        table does not bloat. Every statement autocommits, so no lock on the parent
+        outlives its statement. Expired partitions are detached ``CONCURRENTLY``
+        before they are dropped, which does not block token reads and writes, and
+        creating a partition gives up after ``lock_timeout`` rather than queue
+        traffic behind it; the next run retries. A session advisory lock makes
+        concurrent workers skip rather than race. Returns (created, dropped) names.
+        """
+        table_name = self.refresh_token_table.__tablename__
+        lock_key = func.hashtext(f"{table_name}_partitions")
+        await self.session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        try:
+            if not await self.session.scalar(select(func.pg_try_advisory_lock(lock_key))):
+                return [], []
+            await self.session.execute(text(f"SET lock_timeout = '{lock_timeout}'"))
+            try:
+                partitions = await self._refresh_token_partitions()
+                today = datetime.date.today()
+                created, dropped = [], []
+                for offset in range(days_ahead + 1):
+                    day = today + datetime.timedelta(days=offset)
+                    if day not in partitions:
+                        await self.session.execute(text(
+                            f'CREATE TABLE IF NOT EXISTS "{self._refresh_token_partition_name(day)}" '
+                            f'PARTITION OF "{table_name}" '
+                            f"FOR VALUES FROM ('{day}') TO ('{day + datetime.timedelta(days=1)}')"
+                        ))
+                        created.append(self._refresh_token_partition_name(day))
+                for day, detach_pending in sorted(partitions.items()):
+                    # A partition holds tokens expiring before the next midnight: expired once that has passed.
+                    if day >= today:
+                        continue
+                    name = self._refresh_token_partition_name(day)
+                    # FINALIZE completes a concurrent detach that was interrupted earlier.
+                    mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+                    await self.session.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}" {mode}'))
+                    await self.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                    dropped.append(name)
+                return created, dropped
+            finally:
+                await self.session.execute(text("RESET lock_timeout"))
+                await self.session.scalar(select(func.pg_advisory_unlock(lock_key)))
+        finally:
+            # Hands the connection back to the pool in its default isolation level.
+            await self.session.commit()
+
+    async def revoke_session(
+            self,
+            refresh_token: str | None,
+            jti: str | None = None,
+            expires_at: datetime.datetime | None = None,
+            subject: str | None = None,
+    ) -> None:
+        """Consume the refresh token and record the access token's ``jti`` as revoked.
+
+        With the database token store both happen in one transaction; an
+        external store drops the refresh token before the revocation commits.
+        """
+        if refresh_token is not None:
+            token_hash = Hasher.hash_token(refresh_token)
+            if self.token_store is not None:
+                await self.token_store.discard(token_hash)
+            else:
+                table = self.refresh_token_table
+                await self.session.execute(delete(table).where(table.token_hash == token_hash))
+        if jti is None and self.token_store is not None:
+            return
+        if jti is not None:
+            self.session.add(self.revoked_token_table(jti=jti, expires_at=expires_at))
+        self._record_event("session.ended", jti=jti, sub=subject)
+        await self.session.commit()
+
+    async def get_revoked_tokens(self, since: datetime.datetime | None = None) -> list[RevokedToken]:
+        table = self.revoked_token_table
+        statement = select(table).where(table.expires_at > datetime.datetime.now())
+        if since is not None:
+            statement = statement.where(table.revoked_at > since)
+        result = await self.session.execute(statement)
+        return list(result.scalars())
+
+    async def purge_expired_revoked_tokens(self) -> int:
+        table = self.revoked_token_table
+        statement = delete(table).where(table.expires_at <= datetime.datetime.now())
+        result = await self.session.execute(statement)
+        await self.session.commit()
+        return result.rowcount
+
+    async def claim_outbox_events(self, limit: int) -> list[OutboxEvent]:
+        """Lock the oldest ``limit`` events that are due for delivery.
+
+        Uses ``FOR UPDATE SKIP LOCKED``, so each worker's dispatcher claims a
+        different batch. The locks are held until ``complete_outbox_events`` or
+        ``retry_outbox_events`` commits.
+        """
+        table = self.outbox_table
+        statement = (
+            select(table)
+            .where(table.next_attempt_at <= datetime.datetime.now())
+            .order_by(table.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(await self.session.scalars(statement))
+
+    async def complete_outbox_events(self, ids: list[int]) -> None:
+        await self.session.execute(delete(self.outbox_table).where(self.outbox_table.id.in_(ids)))
+        await self.session.commit()
+
+    async def retry_outbox_events(self, events: list[OutboxEvent], delays: list[float | None]) -> None:
+        """Count a failed attempt for each event and schedule the next one ``delay`` seconds out.
+
+        A delay of None parks the event: it stays in the table but is never claimed again.
+        """
+        now = datetime.datetime.now()
+        for event, delay in zip(events, delays):
+            event.attempts += 1
+            event.next_attempt_at = None if delay is None else now + datetime.timedelta(seconds=delay)
+        await self.session.commit()
+
+    def _record_event(self, event_type: str, user_id: UUID | None = None, **payload) -> None:
+        # Flushed by the caller's commit, so the event exists exactly when the change it describes does.
+        self.session.add(self.outbox_table(event_type=event_type, user_id=user_id, payload=payload))
+
+    def _user_filters(
+            self,
+            role: UserRole | None = None,
+            is_active: bool | None = None,
+            is_verified: bool | None = None,
+    ) -> list:
+        conditions = []
+        if role is not None:
+            conditions.append(self.user_table.role == role)
+        if is_active is not None:
+            conditions.append(self.user_table.is_active == is_active)
+        if is_verified is not None:
+            conditions.append(self.user_table.is_verified == is_verified)
+        return conditions
+
+    @staticmethod
+    def _violated_constraint(error: IntegrityError) -> str:
+        # asyncpg exposes the constraint name on the original driver exception;
+        # other drivers only name the column in the message.
+        cause = getattr(error.orig, "__cause__", None)
+        return getattr(cause, "constraint_name", None) or str(error.orig)
+
+    def _refresh_token_partition_name(self, day: datetime.date) -> str:
+        return f"{self.refresh_token_table.__tablename__}_p{day:%Y%m%d}"
+
+    async def _refresh_token_partitions(self) -> dict[datetime.date, bool]:
+        """Map each daily partition to whether a concurrent detach of it is still pending."""
+        table_name = self.refresh_token_table.__tablename__
+        result = await self.session.execute(text(
+            "SELECT child.relname, pg_inherits.inhdetachpending FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table_name AS regclass)"
+        ), {"table_name": table_name})
+        prefix = f"{table_name}_p"
+        partitions = {}
+        for name, detach_pending in result:
+            if name.startswith(prefix):
+                partitions[datetime.datetime.strptime(name[len(prefix):], "%Y%m%d").date()] = detach_pending
+        return partitions
+
+    def _on_replica(self, statement: Select, *keys) -> Select:
+        """Mark a read for the replicas unless one of ``keys`` was written here moments ago."""
+        if RoutingSession.replicas is None or any(self.sticky_reads.get(key) for key in keys):
+            return statement
+        return statement.execution_options(read_replica=True)
+
+    def _stick(self, *keys) -> None:
+        self.session.info["primary"] = True
+        if RoutingSession.replicas is not None:
+            for key in keys:
+                self.sticky_reads.set(key, True)
+
+    async def _read_user(self, statement: Select, *keys) -> User | None:
+        replica_statement = self._on_replica(statement, *keys)
+        user = await self._get_user(replica_statement)
+        if user is None and replica_statement is not statement:
+            # Replication lag: a user registered on another worker may not have reached the replica yet.
+            user = await self._get_user(statement)
+        return user
 
     async def _get_user(self, statement: Select) -> User | None:
         results = await self.session.execute(statement)
@@ -1,6 +1,7 @@
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, EmailStr
 
 
 class StatusResponse(BaseModel):
@@ -16,5 +17,17 @@ class UserResponse(BaseModel):
     is_superuser: bool
     is_verified: bool
 
-    class ConfigDict:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserPageResponse(BaseModel):
+    items: list[UserResponse]
+    next_cursor: UUID | None = None
+
+
+SUCCESS_BODY = StatusResponse().model_dump_json().encode()
+
+
+def success_response(status_code: int = 200) -> Response:
+    """Return a ``StatusResponse`` body that was serialized once at import time."""
+    return Response(SUCCESS_BODY, status_code=status_code, media_type="application/json")
@@ -0,0 +1,32 @@
+import time
+
+
+class RevocationList:
+    """Per-worker set of revoked access token ids.
+
+    Entries are dropped once their token would have expired anyway, so the
+    set only ever holds tokens revoked within the last access token lifetime.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        if expires_at > time.time():
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def prune(self) -> int:
+        now = time.time()
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        for jti in expired:
+            del self._revoked[jti]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+revocation_list = RevocationList()
@@ -1,12 +1,28 @@
-import datetime
+from typing import Literal
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import APIKeyCookie
 
-from app.auth.exceptions import EmailTaken, IncorrectPassword, InvalidToken, PhoneNumberTaken, UserNotExists
-from app.auth.responses import StatusResponse, UserResponse
+from app.auth.bulk import export_users, import_users, iter_lines
+from app.auth.exceptions import (
+    IncorrectPassword,
+    InvalidToken,
+    ProfilerBusy,
+    ProfilingDisabled,
+    StreamNotPaginated,
+    UserNotExists,
+)
+from app.auth.keys import get_jwks_body
+from app.auth.models import UserRole
+from app.auth.rate_limit import limit_per_account, limit_per_ip
+from app.auth.responses import StatusResponse, UserPageResponse, UserResponse, success_response
 from app.auth.schemas import UserCreateSchema, UserLoginSchema
 from app.auth.services import UserService, get_user_service
+from app.config import settings
+from app.exceptions import PermissionDenied
+from app.profiling import profile_worker, profiler_busy, request_profiler
 
 auth_router = APIRouter(
     prefix="/auth",
@@ -24,86 +40,187 @@ auth_router = APIRouter(
             "description": "Not Found",
             "content": {"application/json": {"example": {"detail": "not found"}}}
         },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Too Many Requests",
+            "content": {"application/json": {"example": {"detail": "too many requests"}}}
+        },
     }
 )
 
+admin_router = APIRouter(prefix="/auth/admin", tags=["Administration"])
+
+well_known_router = APIRouter(prefix="/.well-known", tags=["Keys"])
+
 oauth2_scheme = APIKeyCookie(name="ACCESS_TOKEN", auto_error=False)
 
 
-@auth_router.post("/register", status_code=status.HTTP_201_CREATED)
+async def get_current_user(
+        user_service: UserService = Depends(get_user_service),
+        token: str | None = Depends(oauth2_scheme)
+) -> UserResponse:
+    if token is None:
+        raise InvalidToken
+    token_data = user_service.parse_token(token)
+    if token_data is None:
+        raise InvalidToken
+    user = await user_service.get_profile(token_data["sub"])
+    if user is None:
+        raise InvalidToken
+    return user
+
+
+async def get_superuser(user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    if not user.is_superuser:
+        raise PermissionDenied
+    return user
+
+
+async def get_staff_user(user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    if not user.is_superuser and user.role != UserRole.moderator.value:
+        raise PermissionDenied
+    return user
+
+
+@auth_router.post(
+    "/register",
+    status_code=status.HTTP_201_CREATED,
+    response_model=StatusResponse,
+    dependencies=[Depends(limit_per_ip("register", settings.REGISTER_RATE_LIMIT_PER_IP))],
+)
 async def register(
         user_data: UserCreateSchema,
         user_service: UserService = Depends(get_user_service)
-) -> StatusResponse:
-    existing_user = await user_service.get_by_email(user_data.email)
-    if existing_user:
-        raise EmailTaken
-    existing_user = await user_service.get_by_phone_number(user_data.phone_number)
-    if existing_user:
-        raise PhoneNumberTaken
+) -> Response:
+    await limit_per_account("register", user_data.email, settings.REGISTER_RATE_LIMIT_PER_ACCOUNT)
     user_data = user_data.model_dump()
     await user_service.create(user_data)
-    return StatusResponse
+    return success_response(status.HTTP_201_CREATED)
 
 
-@auth_router.post("/login")
+@auth_router.post(
+    "/login",
+    response_model=StatusResponse,
+    dependencies=[Depends(limit_per_ip("login", settings.LOGIN_RATE_LIMIT_PER_IP))],
+)
 async def login(
-        response: Response,
         user_data: UserLoginSchema,
         user_service: UserService = Depends(get_user_service)
-) -> StatusResponse:
+) -> Response:
+    await limit_per_account("login", user_data.email, settings.LOGIN_RATE_LIMIT_PER_ACCOUNT)
     existing_user = await user_service.get_by_email(user_data.email)
     if not existing_user:
         raise UserNotExists
-    verified = user_service.verify(existing_user, user_data.password)
+    verified = await user_service.verify(existing_user, user_data.password)
     if not verified:
         raise IncorrectPassword
     tokens = await user_service.generate_tokens(existing_user)
+    response = success_response()
     user_service.set_login_cookie(response, **tokens)
-    return StatusResponse
+    return response
 
 
-@auth_router.post("/logout")
+@auth_router.post("/logout", response_model=StatusResponse)
 async def logout(
-        response: Response,
-        user_service: UserService = Depends(get_user_service)
-) -> StatusResponse:
+        request: Request,
+        user_service: UserService = Depends(get_user_service),
+        token: str | None = Depends(oauth2_scheme)
+) -> Response:
+    await user_service.revoke_session(token, request.cookies.get("REFRESH_TOKEN"))
+    response = success_response()
     user_service.set_logout_cookie(response)
-    return StatusResponse
+    return response
 
 
-@auth_router.post("/refresh")
+@auth_router.post("/refresh", response_model=StatusResponse)
 async def refresh_tokens(
         request: Request,
-        response: Response,
         user_service: UserService = Depends(get_user_service)
-) -> StatusResponse:
+) -> Response:
     refresh_token = request.cookies.get("REFRESH_TOKEN")
     if not refresh_token:
         raise InvalidToken
-    refresh_token_data = await user_service.get_refresh_token(refresh_token)
-    if not refresh_token_data:
+    new_tokens = await user_service.rotate_tokens(refresh_token)
+    if not new_tokens:
         raise InvalidToken
-    if refresh_token_data.expires_at < datetime.datetime.now():
-        raise InvalidToken
-    user = await user_service.get_by_id(refresh_token_data.user_id)
-    new_tokens = await user_service.generate_tokens(user)
+    response = success_response()
     user_service.set_login_cookie(response, **new_tokens)
-    return StatusResponse
+    return response
+
 
+@auth_router.get("/me", response_model=UserResponse)
+async def get_me(user: UserResponse = Depends(get_current_user)) -> Response:
+    # Already validated (and cached) by get_current_user; serialize straight to JSON bytes.
+    return Response(user.model_dump_json(), media_type="application/json")
 
-@auth_router.get("/me")
-async def get_me(
+
+@admin_router.get("/users", response_model=None)
+async def list_users(
+        after: UUID | None = None,
+        limit: int | None = Query(default=None, ge=1, le=1000),
+        role: UserRole | None = None,
+        is_active: bool | None = None,
+        is_verified: bool | None = None,
+        stream: bool = False,
         user_service: UserService = Depends(get_user_service),
-        token: str | None = Depends(oauth2_scheme)
-) -> UserResponse:
-    if token is None:
-        raise InvalidToken
-    token_data = user_service.parse_token(token)
-    email = token_data.get("sub")
-    if email is None:
-        raise InvalidToken
-    user = await user_service.get_by_email(email)
-    if user is None:
-        raise InvalidToken
+        user: UserResponse = Depends(get_staff_user)
+) -> UserPageResponse | StreamingResponse:
+    filters = {"role": role, "is_active": is_active, "is_verified": is_verified}
+    if stream:
+        # The stream is the whole filtered listing; pages are for the keyset cursor.
+        if after is not None or limit is not None:
+            raise StreamNotPaginated
+        return StreamingResponse(export_users("jsonl", **filters), media_type="application/x-ndjson")
+    limit = limit or 100
+    items = await user_service.list_users(after, limit, **filters)
+    next_cursor = items[-1]["id"] if len(items) == limit else None
+    return UserPageResponse(items=items, next_cursor=next_cursor)
+
+
+@admin_router.post("/users/import")
+async def import_users_endpoint(
+        request: Request,
+        format: Literal["csv", "jsonl"] = "jsonl",
+        user: UserResponse = Depends(get_superuser)
+) -> dict:
+    return await import_users(iter_lines(request.stream()), format)
+
+
+@admin_router.get("/users/export")
+async def export_users_endpoint(
+        format: Literal["csv", "jsonl"] = "jsonl",
+        user: UserResponse = Depends(get_superuser)
+) -> StreamingResponse:
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(export_users(format), media_type=media_type)
+
+
+async def get_profiling_superuser(user: UserResponse = Depends(get_superuser)) -> UserResponse:
+    if not settings.PROFILING_ENABLED:
+        raise ProfilingDisabled
     return user
+
+
+@admin_router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker_endpoint(
+        seconds: float = Query(default=10, gt=0, le=settings.PROFILING_MAX_SECONDS),
+        user: UserResponse = Depends(get_profiling_superuser)
+) -> str:
+    """Sample every thread of the worker that serves this request; collapsed stacks."""
+    if profiler_busy():
+        raise ProfilerBusy
+    return await profile_worker(seconds)
+
+
+@admin_router.get("/profile/requests", response_class=PlainTextResponse)
+async def profile_requests_endpoint(user: UserResponse = Depends(get_profiling_superuser)) -> str:
+    """Collapsed stacks of requests sampled by ProfilingMiddleware since the last call."""
+    return request_profiler.reset()
+
+
+@well_known_router.get("/jwks.json")
+async def get_jwks() -> Response:
+    return Response(
+        get_jwks_body(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"},
+    )
@@ -1,8 +1,9 @@
 import re
 
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, field_validator, model_validator
 
 from app.auth.models import UserRole
+from app.auth.utils import Hasher
 
 
 class PasswordMixin(BaseModel):
@@ -36,6 +37,23 @@ class UserCreateSchema(PasswordMixin):
         return phone_number
 
 
+class UserImportSchema(UserCreateSchema):
+    password: str | None = None
+    hashed_password: str | None = None
+
+    @field_validator('hashed_password')
+    def validate_hashed_password(cls, value):
+        if value is not None and Hasher.pwd_context.identify(value, required=False) is None:
+            raise ValueError('Unrecognized password hash format')
+        return value
+
+    @model_validator(mode='after')
+    def validate_credentials(self):
+        if self.password is None and self.hashed_password is None:
+            raise ValueError('Either password or hashed_password is required')
+        return self
+
+
 class UserLoginSchema(BaseModel):
     email: EmailStr
     password: str
@@ -2,16 +2,24 @@ import datetime
 from uuid import UUID
 
 from fastapi import Depends, Response
-from jose import jwt
 
-from app.auth.models import RefreshToken, User, UserRole
+from app.auth.cache import TTLCache
+from app.auth.models import User, UserRole
 from app.auth.repositories import UserRepository, get_user_repository
+from app.auth.responses import UserResponse
 from app.auth.utils import Hasher
 from app.config import settings
+from app.tracing import trace_methods
 
+# Profiles by lowercased email. Every write to a user must call UserService.invalidate_user
+# (or delete the key) so this worker stops serving the old profile before the TTL runs out.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
 
+
+@trace_methods
 class UserService:
     hasher = Hasher
+    user_cache = user_cache
     token_lifetime = datetime.timedelta(minutes=1)
 
     def __init__(self, user_db: UserRepository):
@@ -26,8 +34,31 @@ class UserService:
     async def get_by_phone_number(self, phone_number: str) -> User | None:
         return await self.user_db.get_by_phone_number(phone_number)
 
-    def verify(self, user: User, password: str) -> bool:
-        return self.hasher.verify_password(password, user.hashed_password)
+    async def list_users(self, after: UUID | None, limit: int, **filters) -> list[dict]:
+        return await self.user_db.list_users(after, limit, **filters)
+
+    async def get_profile(self, user_email: str) -> UserResponse | None:
+        key = user_email.lower()
+        profile = self.user_cache.get(key)
+        if profile is not None:
+            return profile
+        row = await self.user_db.get_profile_by_email(user_email)
+        if row is None:
+            return None
+        profile = UserResponse.model_validate(row)
+        self.user_cache.set(key, profile)
+        return profile
+
+    def invalidate_user(self, user_email: str) -> None:
+        self.user_cache.delete(user_email.lower())
+
+    async def verify(self, user: User, password: str) -> bool:
+        verified, new_hash = await self.hasher.verify_and_update_async(password, user.hashed_password)
+        if verified and new_hash is not None:
+            await self.user_db.update_password_hash(user.id, new_hash)
+            user.hashed_password = new_hash
+            self.invalidate_user(user.email)
+        return verified
 
     def parse_token(self, token: str) -> dict | None:
         return self.hasher.parse_token(token)
@@ -35,23 +66,25 @@ class UserService:
     async def create(self, user_data: dict) -> User:
         password = user_data.pop("password")
         user_data["email"] = user_data["email"].lower()
-        user_data["hashed_password"] = self.hasher.get_password_hash(password)
+        user_data["hashed_password"] = await self.hasher.get_password_hash_async(password)
         created_user = await self.user_db.create(user_data)
+        self.invalidate_user(created_user.email)
         return created_user
 
     def create_access_token(self, user_email: str, user_role: UserRole) -> str | None:
-        data = {"sub": user_email, "role": user_role.value}
+        data = {"sub": user_email, "role": user_role.value, "jti": self.hasher.generate_unique_string(16)}
         to_encode = data.copy()
         expire = datetime.datetime.now(datetime.UTC) + self.token_lifetime
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET, algorithm=settings.ALGORITHM)
+        encoded_jwt = self.hasher.encode_token(to_encode)
         return encoded_jwt
 
-    def set_login_cookie(self, response: Response, access_token, refresh_token: str) -> None:
+    @classmethod
+    def set_login_cookie(cls, response: Response, access_token, refresh_token: str) -> None:
         response.set_cookie(
             "ACCESS_TOKEN", access_token,
             httponly=True,
-            expires=datetime.datetime.now(datetime.UTC) + self.token_lifetime,
+            expires=datetime.datetime.now(datetime.UTC) + cls.token_lifetime,
         )
         response.set_cookie(
             "REFRESH_TOKEN", refresh_token,
@@ -59,13 +92,35 @@ class UserService:
             expires=datetime.datetime.now(datetime.UTC) + datetime.timedelta(days=7)
         )
 
+    async def revoke_session(self, access_token: str | None, refresh_token: str | None) -> None:
+        token_data = self.parse_token(access_token) if access_token else None
+        if token_data is None or token_data["jti"] is None:
+            if refresh_token:
+                await self.user_db.revoke_session(refresh_token)
+            return
+        self.hasher.revocation_list.revoke(token_data["jti"], token_data["exp"])
+        await self.user_db.revoke_session(
+            refresh_token or None,
+            token_data["jti"],
+            datetime.datetime.fromtimestamp(token_data["exp"]),
+            token_data["sub"],
+        )
+
     @staticmethod
     def set_logout_cookie(response: Response) -> None:
         response.set_cookie("ACCESS_TOKEN", "")
         response.set_cookie("REFRESH_TOKEN", "")
 
-    async def get_refresh_token(self, refresh_token: str) -> RefreshToken | None:
-        return await self.user_db.get_refresh_token(refresh_token)
+    async def rotate_tokens(self, refresh_token: str) -> dict[str, str] | None:
+        new_refresh_token = self.hasher.generate_unique_string()
+        user = await self.user_db.rotate_refresh_token(refresh_token, new_refresh_token)
+        if user is None:
+            return None
+        tokens = {
+            "access_token": self.create_access_token(user["email"], user["role"]),
+            "refresh_token": new_refresh_token
+        }
+        return tokens
 
     async def generate_tokens(self, user: User) -> dict[str, str]:
         access_token = self.create_access_token(user.email, user.role)
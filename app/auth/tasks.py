@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+import logging
+
+from app import database
+from app.auth.outbox import event_dispatcher
+from app.auth.repositories import UserRepository
+from app.auth.revocation import revocation_list
+from app.auth.services import user_cache
+from app.auth.token_store import MemoryTokenStore, token_store
+from app.auth.utils import hashing_pool, token_cache
+from app.config import settings
+from app.database import async_session_maker, pool_stats
+from app.metrics import (
+    CACHE,
+    CACHE_LOOKUPS,
+    DB_POOL,
+    DB_POOL_CHECKOUTS,
+    DB_POOL_UTILIZATION,
+    DB_POOL_WAIT,
+    DB_POOL_WAIT_MAX,
+    HASHING_POOL,
+    HASHING_POOL_CALLS,
+    advance_counter,
+    set_gauges,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_expired_refresh_tokens() -> int:
+    """Purge expired refresh tokens from the in-memory store; Redis expires its own keys."""
+    if isinstance(token_store, MemoryTokenStore):
+        return token_store.purge_expired()
+    return 0
+
+
+async def maintain_refresh_token_partitions(
+        days_ahead: int = settings.REFRESH_TOKEN_PARTITION_DAYS_AHEAD
+) -> tuple[list[str], list[str]]:
+    async with async_session_maker() as session:
+        return await UserRepository(session).maintain_refresh_token_partitions(days_ahead)
+
+
+async def refresh_token_sweeper(interval: int = settings.REFRESH_TOKEN_PURGE_INTERVAL) -> None:
+    # Runs once at startup as well, so partitions exist before the first interval elapses.
+    while True:
+        try:
+            if token_store is None:
+                created, dropped = await maintain_refresh_token_partitions()
+                logger.info("Refresh token partitions: created %s, dropped %s", created, dropped)
+            else:
+                logger.info("Purged %d expired refresh tokens", await purge_expired_refresh_tokens())
+            async with async_session_maker() as session:
+                await UserRepository(session).purge_expired_revoked_tokens()
+        except Exception:
+            logger.exception("Refresh token purge failed")
+        await asyncio.sleep(interval)
+
+
+async def sync_revoked_tokens(since: datetime.datetime | None = None) -> datetime.datetime | None:
+    """Pull tokens revoked by other workers into the local revocation list.
+
+    Returns the newest ``revoked_at`` seen, to pass back in on the next call.
+    """
+    async with async_session_maker() as session:
+        revoked_tokens = await UserRepository(session).get_revoked_tokens(since)
+    for revoked_token in revoked_tokens:
+        revocation_list.revoke(revoked_token.jti, revoked_token.expires_at.timestamp())
+        if since is None or revoked_token.revoked_at > since:
+            since = revoked_token.revoked_at
+    revocation_list.prune()
+    return since
+
+
+async def revocation_sync(interval: int = settings.REVOCATION_SYNC_INTERVAL) -> None:
+    # Re-read a short overlap window so rows committed slightly out of revoked_at order are not missed.
+    overlap = datetime.timedelta(seconds=max(interval * 2, 10))
+    since = None
+    while True:
+        try:
+            newest = await sync_revoked_tokens(since - overlap if since else None)
+        except Exception:
+            logger.exception("Revoked token sync failed")
+        else:
+            since = newest or since
+        await asyncio.sleep(interval)
+
+
+async def replica_health_check(interval: int = settings.DB_REPLICA_CHECK_INTERVAL) -> None:
+    while database.replicas is not None:
+        await database.replicas.check()
+        await asyncio.sleep(interval)
+
+
+def update_metrics() -> None:
+    # Cumulative fields are exported as counters, so rate() survives workers exiting.
+    for pool, stats in pool_stats().items():
+        advance_counter(DB_POOL_CHECKOUTS, stats.pop("checkouts"), pool)
+        advance_counter(DB_POOL_WAIT, stats.pop("wait_seconds_total"), pool)
+        DB_POOL_WAIT_MAX.labels(pool).set(stats.pop("wait_seconds_max"))
+        DB_POOL_UTILIZATION.labels(pool).set(stats.pop("utilization"))
+        set_gauges(DB_POOL, stats, pool)
+    stats = hashing_pool.stats()
+    for outcome in ("completed", "rejected"):
+        advance_counter(HASHING_POOL_CALLS, stats.pop(outcome), outcome)
+    set_gauges(HASHING_POOL, stats)
+    for name, cache in (("token", token_cache), ("user", user_cache)):
+        stats = cache.stats()
+        for result in ("hits", "misses"):
+            advance_counter(CACHE_LOOKUPS, stats.pop(result), name, result)
+        set_gauges(CACHE, stats, name)
+    CACHE.labels("revocation", "size").set(len(revocation_list))
+
+
+async def metrics_refresher(interval: int = settings.METRICS_REFRESH_INTERVAL) -> None:
+    # Gauges are sampled here instead of on every pool checkout or cache lookup.
+    while True:
+        try:
+            update_metrics()
+        except Exception:
+            logger.exception("Metrics refresh failed")
+        await asyncio.sleep(interval)
+
+
+async def outbox_dispatcher(interval: float = settings.OUTBOX_POLL_INTERVAL) -> None:
+    # A full batch means more may be waiting, so drain without sleeping until one comes back short.
+    while True:
+        try:
+            claimed = await event_dispatcher.dispatch_once()
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+            claimed = 0
+        if claimed < event_dispatcher.batch_size:
+            await asyncio.sleep(interval)
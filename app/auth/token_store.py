@@ -0,0 +1,102 @@
+import abc
+import datetime
+import time
+from uuid import UUID
+
+from app.config import settings
+
+
+class TokenStore(abc.ABC):
+    """Key-value storage for refresh token digests, each mapped to its owner and expiring on its own."""
+
+    @abc.abstractmethod
+    async def add(self, token_hash: str, user_id: UUID, lifetime: datetime.timedelta) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def rotate(self, token_hash: str, new_token_hash: str, lifetime: datetime.timedelta) -> UUID | None:
+        """Atomically consume ``token_hash`` and store ``new_token_hash`` for the same user."""
+
+    @abc.abstractmethod
+    async def discard(self, token_hash: str) -> None:
+        ...
+
+
+class MemoryTokenStore(TokenStore):
+    """Process-local store for tests and single-process deployments.
+
+    Every worker process has its own copy, so with several workers a refresh
+    that lands on another worker fails; gunicorn.conf.py refuses to start so.
+    """
+
+    def __init__(self):
+        self._tokens: dict[str, tuple[UUID, float]] = {}
+
+    async def add(self, token_hash: str, user_id: UUID, lifetime: datetime.timedelta) -> None:
+        self._tokens[token_hash] = (user_id, time.time() + lifetime.total_seconds())
+
+    async def rotate(self, token_hash: str, new_token_hash: str, lifetime: datetime.timedelta) -> UUID | None:
+        item = self._tokens.pop(token_hash, None)
+        if item is None:
+            return None
+        user_id, expires_at = item
+        if expires_at <= time.time():
+            return None
+        self._tokens[new_token_hash] = (user_id, time.time() + lifetime.total_seconds())
+        return user_id
+
+    async def discard(self, token_hash: str) -> None:
+        self._tokens.pop(token_hash, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        expired = [key for key, (_, expires_at) in self._tokens.items() if expires_at <= now]
+        for key in expired:
+            del self._tokens[key]
+        return len(expired)
+
+
+class RedisTokenStore(TokenStore):
+    """Shared store on a Redis-compatible server; key TTLs take care of expiry."""
+
+    key_prefix = "refresh_token:"
+    # GETDEL the old key and SET the successor in one round trip.
+    rotate_script = """
+    local user_id = redis.call('GETDEL', KEYS[1])
+    if user_id then
+        redis.call('SET', KEYS[2], user_id, 'EX', ARGV[1])
+    end
+    return user_id
+    """
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self._rotate = self.client.register_script(self.rotate_script)
+
+    async def add(self, token_hash: str, user_id: UUID, lifetime: datetime.timedelta) -> None:
+        await self.client.set(self.key_prefix + token_hash, str(user_id), ex=lifetime)
+
+    async def rotate(self, token_hash: str, new_token_hash: str, lifetime: datetime.timedelta) -> UUID | None:
+        user_id = await self._rotate(
+            keys=[self.key_prefix + token_hash, self.key_prefix + new_token_hash],
+            args=[int(lifetime.total_seconds())],
+        )
+        return UUID(user_id) if user_id else None
+
+    async def discard(self, token_hash: str) -> None:
+        await self.client.delete(self.key_prefix + token_hash)
+
+
+def build_token_store(backend: str) -> TokenStore | None:
+    if backend == "database":
+        return None
+    if backend == "memory":
+        return MemoryTokenStore()
+    if backend == "redis":
+        return RedisTokenStore(settings.REDIS_URL)
+    raise ValueError(f"Unknown token store backend: {backend}")
+
+
+token_store = build_token_store(settings.TOKEN_STORE)
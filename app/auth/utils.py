@@ -1,14 +1,139 @@
+import asyncio
 import datetime
+import hashlib
+import multiprocessing
 import secrets
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
 
-from jose import JWTError, jwt
+from jwt import PyJWTError
 from passlib.context import CryptContext
 
+from app.auth.cache import TTLCache, token_digest
+from app.auth.exceptions import HashingPoolSaturated
+from app.auth.keys import get_jwks_body, get_key_ring
+from app.auth.revocation import revocation_list
 from app.config import settings
+from app.metrics import SERVICE_LATENCY, observe
+from app.tracing import span
+
+
+class HashingPool:
+    """Bounded executor for CPU-bound password hashing.
+
+    At most ``max_workers`` hashes run at once and at most ``max_pending``
+    calls may be waiting or running; anything beyond that is rejected with
+    ``HashingPoolSaturated`` instead of queueing behind the event loop.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, max_pending: int = 32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawn, never fork: the pool starts inside a running worker whose event loop,
+                # threads and database sockets must not be copied into children (as in app.auth.bulk).
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hasher")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HashingPoolSaturated
+        self._pending += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        except BaseException:
+            self._pending -= 1
+            raise
+        # The slot is released when the job finishes, not when its caller stops waiting:
+        # a cancelled request must not let more hashes run than the pool admits.
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+
+    def _release(self, future: asyncio.Future) -> None:
+        self._pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self._completed += 1
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "queued": max(self._pending - self.max_workers, 0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    kind=settings.HASHING_POOL_KIND,
+    max_workers=settings.HASHING_POOL_WORKERS,
+    max_pending=settings.HASHING_POOL_MAX_PENDING,
+)
+
+
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+
+def build_crypt_context(
+        scheme: str = settings.PASSWORD_HASH_SCHEME,
+        bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+        argon2_time_cost: int = settings.ARGON2_TIME_COST,
+        argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+        argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+) -> CryptContext:
+    """Hash with ``scheme`` at the configured cost.
+
+    Hashes from the other scheme or with different cost parameters still verify
+    but report ``needs_update``, so they are rehashed on the next login.
+    """
+    if scheme not in ("bcrypt", "argon2"):
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+    schemes = ["bcrypt", "argon2"] if scheme == "bcrypt" else ["argon2", "bcrypt"]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
 
 
 class Hasher:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = build_crypt_context()
+    pool = hashing_pool
+    token_cache = token_cache
+    revocation_list = revocation_list
+    timers = {
+        operation: SERVICE_LATENCY.labels(operation)
+        for operation in ("hash", "verify", "token_encode", "token_decode")
+    }
 
     @classmethod
     def verify_password(cls, plain_password, hashed_password: str):
@@ -18,23 +143,75 @@ class Hasher:
     def get_password_hash(cls, password: str) -> str:
         return cls.pwd_context.hash(password)
 
+    @classmethod
+    def verify_and_update(cls, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return cls.pwd_context.verify_and_update(plain_password, hashed_password)
+
+    @classmethod
+    async def verify_and_update_async(cls, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        with observe(cls.timers["verify"], "verify"), span("password.verify"):
+            return await cls.pool.run(cls.verify_and_update, plain_password, hashed_password)
+
+    @classmethod
+    async def get_password_hash_async(cls, password: str) -> str:
+        with observe(cls.timers["hash"], "hash"), span("password.hash"):
+            return await cls.pool.run(cls.get_password_hash, password)
+
     @classmethod
     def generate_unique_string(cls, byte: int = 64) -> str:
         return secrets.token_urlsafe(byte)
 
     @classmethod
-    def parse_token(cls, token: str) -> dict | None:
+    def hash_token(cls, token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def encode_token(cls, claims: dict) -> str:
+        with observe(cls.timers["token_encode"], "jwt"), span("jwt.encode"):
+            return get_key_ring().encode(claims)
+
+    @classmethod
+    def parse_token(cls, token: str, verify_exp: bool = True) -> dict | None:
+        """Return the claims of a valid, unrevoked token; ``verify_exp=False`` also accepts expired ones."""
+        key = token_digest(token)
+        token_data = cls.token_cache.get(key)
+        if token_data is None:
+            with observe(cls.timers["token_decode"], "jwt"), span("jwt.decode"):
+                token_data = cls._decode_token(token, verify_exp)
+            if token_data is None:
+                return None
+            if token_data["exp"] is not None and verify_exp:
+                cls.token_cache.set(key, token_data, expires_at=token_data["exp"])
+        if token_data["jti"] is not None and cls.revocation_list.is_revoked(token_data["jti"]):
+            return None
+        return token_data
+
+    @classmethod
+    def _decode_token(cls, token: str, verify_exp: bool = True) -> dict | None:
         try:
-            payload = jwt.decode(token, settings.SECRET, algorithms=[settings.ALGORITHM])
+            payload = get_key_ring().decode(token, verify_exp)
             email: str = payload.get("sub")
             role: str = payload.get("role")
+            jti: str = payload.get("jti")
             expired: datetime.datetime = payload.get("exp")
             if email is None:
                 return None
-        except JWTError:
+        except PyJWTError:
             return None
         return {
             "sub": email,
             "exp": expired,
-            "role": role
+            "role": role,
+            "jti": jti
         }
+
+
+def warm_up() -> None:
+    """Load the key ring and the password hash backend ahead of the first request.
+
+    Called by the gunicorn master when preloading, so workers inherit both
+    copy-on-write instead of each loading them on its first login.
+    """
+    get_key_ring()
+    get_jwks_body()
+    Hasher.pwd_context.handler().get_backend()
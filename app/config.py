@@ -10,6 +10,19 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_PGBOUNCER: bool = False
+
+    DB_REPLICA_URLS: list[str] = []  # JSON list of postgresql+asyncpg:// DSNs
+    DB_REPLICA_CHECK_INTERVAL: int = 5
+    DB_REPLICA_CHECK_TIMEOUT: float = 1.0
+    DB_REPLICA_STICKY_SECONDS: int = 10
+
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
@@ -31,6 +44,71 @@ class Settings(BaseSettings):
 
     SECRET: str
     ALGORITHM: str
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None
+    JWKS_MAX_AGE: int = 300
+
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # "bcrypt" or "argon2"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    HASHING_POOL_KIND: str = "thread"  # "thread" or "process"
+    HASHING_POOL_WORKERS: int = 2
+    HASHING_POOL_MAX_PENDING: int = 32
+
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 300
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 30
+
+    TOKEN_STORE: str = "database"  # "database", "memory" or "redis"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    REVOCATION_SYNC_INTERVAL: int = 5
+
+    SESSION_REFRESH_WINDOW: int = 20
+
+    # "memory" counts per process, so gunicorn.conf.py refuses it with more than one worker.
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "redis"
+    RATE_LIMIT_WINDOW: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 30
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = 5
+    REGISTER_RATE_LIMIT_PER_IP: int = 10
+    REGISTER_RATE_LIMIT_PER_ACCOUNT: int = 5
+
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_PROCESSES: int = 4
+    BULK_EXPORT_YIELD_PER: int = 1000
+
+    REFRESH_TOKEN_PURGE_INTERVAL: int = 600
+    REFRESH_TOKEN_PARTITION_DAYS_AHEAD: int = 10  # above the refresh token lifetime (7 days): no default partition
+
+    SERVER_TIMING_ENABLED: bool = False
+    METRICS_REFRESH_INTERVAL: int = 5
+
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "otlp"  # "otlp", "console" or "memory"
+    TRACING_OTLP_ENDPOINT: str | None = None  # None falls back to OTEL_EXPORTER_OTLP_ENDPOINT
+    TRACING_SAMPLE_RATIO: float = 0.1
+    TRACING_SERVICE_NAME: str = "auth-service"
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_REQUEST_SAMPLE_RATE: float = 0.0
+
+    OUTBOX_SINKS: list[str] = ["log"]  # any of "log", "webhook", "queue"
+    OUTBOX_LOG_PATH: str = "auth_events.log"
+    OUTBOX_WEBHOOK_URL: str | None = None
+    OUTBOX_WEBHOOK_TIMEOUT: float = 5.0
+    OUTBOX_QUEUE_SIZE: int = 10000
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE: float = 1.0
+    OUTBOX_BACKOFF_MAX: float = 300.0
 
     model_config = SettingsConfigDict(env_file=".env")
 
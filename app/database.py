@@ -1,15 +1,201 @@
+import asyncio
+import itertools
+import logging
+import time
 import uuid
 from typing import Annotated
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, mapped_column
+from sqlalchemy import AsyncAdaptedQueuePool, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, mapped_column
 
 from app.config import settings
 
 DB_URL = settings.DB_URL
 
-engine = create_async_engine(DB_URL)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def take_wait_max(self) -> float:
+        """The longest wait since the previous call."""
+        wait_max, self.wait_max = self.wait_max, 0.0
+        return wait_max
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "InstrumentedPool":
+        # engine.dispose() swaps in a fresh pool; keep counting across it.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+
+def build_engine(url: str) -> AsyncEngine:
+    if not url.startswith("postgresql+asyncpg"):
+        return create_async_engine(url)
+    statement_cache_size = 0 if settings.DB_PGBOUNCER else settings.DB_STATEMENT_CACHE_SIZE
+    connect_args = {}
+    if settings.DB_PGBOUNCER:
+        # PgBouncer in transaction mode cannot keep server-side prepared statements
+        # between transactions: disable asyncpg's own cache and use unique names.
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return create_async_engine(
+        make_url(url).update_query_dict({"prepared_statement_cache_size": str(statement_cache_size)}),
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+class ReplicaSet:
+    """Round-robin over the replicas that passed their last health check."""
+
+    def __init__(self, engines: list[AsyncEngine], check_timeout: float = settings.DB_REPLICA_CHECK_TIMEOUT):
+        self.engines = engines
+        self.healthy = list(engines)
+        self.check_timeout = check_timeout
+        self._counter = itertools.count()
+
+    def choose(self) -> AsyncEngine | None:
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check(self) -> None:
+        healthy = []
+        for replica in self.engines:
+            try:
+                # Bound the connect too: a replica that drops packets would otherwise hold the
+                # check for the whole connect timeout.
+                async with asyncio.timeout(self.check_timeout):
+                    async with replica.connect() as connection:
+                        await connection.execute(text("SELECT 1"))
+            except Exception as error:
+                logger.warning("Replica %r failed its health check: %r", replica.url, error)
+            else:
+                healthy.append(replica)
+        self.healthy = healthy
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+class RoutingSession(Session):
+    """Send statements marked ``read_replica`` to a healthy replica, everything else to the primary.
+
+    Once the session has written anything it stays on the primary, so a
+    request reads its own writes. Set ``session.info["primary"] = True`` to pin
+    a session explicitly.
+    """
+
+    replicas: ReplicaSet | None = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["primary"] = True
+        elif self.replicas is not None and not self.info.get("primary") and self._wants_replica(clause):
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    @staticmethod
+    def _wants_replica(clause) -> bool:
+        get_options = getattr(clause, "get_execution_options", None)
+        return get_options is not None and get_options().get("read_replica", False)
+
+
+# The engines are created per process by init_engine() (the app lifespan, or a CLI
+# entry point), never at import: with gunicorn --preload the app is imported once
+# in the master and a connection pool must not be inherited across fork().
+engine: AsyncEngine | None = None
+replicas: ReplicaSet | None = None
+async_session_maker = async_sessionmaker(expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutingSession)
+
+
+def init_engine(url: str = DB_URL, replica_urls: list[str] = settings.DB_REPLICA_URLS) -> AsyncEngine:
+    global engine, replicas
+    if engine is None:
+        engine = build_engine(url)
+        async_session_maker.configure(bind=engine)
+        if replica_urls:
+            replicas = RoutingSession.replicas = ReplicaSet([build_engine(replica_url) for replica_url in replica_urls])
+    return engine
+
+
+def all_engines() -> list[AsyncEngine]:
+    """The primary followed by the replicas, for per-engine instrumentation."""
+    if engine is None:
+        return []
+    return [engine, *(replicas.engines if replicas is not None else ())]
+
+
+async def dispose_engine() -> None:
+    global engine, replicas
+    if replicas is not None:
+        await replicas.dispose()
+        replicas = RoutingSession.replicas = None
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+        async_session_maker.configure(bind=None)
+
+
+def pool_stats() -> dict[str, dict[str, int | float]]:
+    """Per-engine pool stats, keyed ``primary`` and ``replica<N>`` in configuration order.
+
+    ``wait_seconds_max`` covers the time since the previous call.
+    """
+    engines = all_engines()
+    names = ["primary", *(f"replica{index}" for index in range(len(engines) - 1))]
+    return {name: engine_pool_stats(engine) for name, engine in zip(names, engines)}
+
+
+def engine_pool_stats(engine: AsyncEngine) -> dict[str, int | float]:
+    pool = engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    stats = pool.stats
+    return {
+        "size": pool.size(),
+        "capacity": capacity,
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "utilization": pool.checkedout() / capacity if capacity else 0.0,
+        "checkouts": stats.checkouts,
+        "wait_seconds_total": stats.wait_total,
+        "wait_seconds_max": stats.take_wait_max(),
+    }
 
 
 class Base(DeclarativeBase):
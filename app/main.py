@@ -1,21 +1,66 @@
-import os
-import sys
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 
-import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
-from app.auth.middlewares import refresh_tokens_middleware
+from app.auth.middlewares import SlidingSessionMiddleware
+from app.auth.outbox import event_dispatcher
+from app.auth.router import admin_router, auth_router, well_known_router
+from app.auth.tasks import (
+    metrics_refresher,
+    outbox_dispatcher,
+    refresh_token_sweeper,
+    replica_health_check,
+    revocation_sync,
+)
+from app.auth.utils import hashing_pool
 from app.config import settings
+from app.database import all_engines, dispose_engine, init_engine
+from app.metrics import MetricsMiddleware, metrics_router
+from app.profiling import ProfilingMiddleware
+from app.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_engine()
+    setup_tracing(*all_engines())
+    tasks = [
+        asyncio.create_task(refresh_token_sweeper()),
+        asyncio.create_task(revocation_sync()),
+        asyncio.create_task(metrics_refresher()),
+        asyncio.create_task(replica_health_check()),
+        asyncio.create_task(outbox_dispatcher()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await event_dispatcher.close()
+    hashing_pool.shutdown()
+    shutdown_tracing()
+    await dispose_engine()
 
-sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from app.auth.router import auth_router
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 app.include_router(auth_router)
+app.include_router(admin_router)
+app.include_router(well_known_router)
+app.include_router(metrics_router)
 
+app.add_middleware(SlidingSessionMiddleware)
+if settings.PROFILING_ENABLED and settings.PROFILING_REQUEST_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,9 +69,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# app.middleware("http")(refresh_tokens_middleware)
-
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app", reload=True,
         # host=settings.ID_ADDRESS
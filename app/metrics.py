@@ -0,0 +1,162 @@
+"""Prometheus metrics and optional Server-Timing headers.
+
+Set ``PROMETHEUS_MULTIPROC_DIR`` (see app.sh and gunicorn.conf.py) so that
+/metrics aggregates every gunicorn worker rather than the one that answered.
+"""
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+SERVICE_LATENCY = Histogram(
+    "auth_service_operation_seconds", "Password hashing and token codec latency",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "auth_repository_query_seconds", "UserRepository call latency",
+    ["query"], buckets=LATENCY_BUCKETS,
+)
+DB_POOL = Gauge("db_pool", "Database pool state", ["pool", "field"], multiprocess_mode="livesum")
+# A ratio cannot be summed across workers: keep one series per worker (or divide checked_out by capacity).
+DB_POOL_UTILIZATION = Gauge(
+    "db_pool_utilization", "Checked-out share of a worker's pool capacity", ["pool"], multiprocess_mode="liveall",
+)
+DB_POOL_WAIT_MAX = Gauge(
+    "db_pool_wait_max_seconds", "Longest pool checkout wait", ["pool"], multiprocess_mode="livemax",
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts", "Database pool checkouts", ["pool"])
+DB_POOL_WAIT = Counter("db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["pool"])
+HASHING_POOL = Gauge("hashing_pool", "Password hashing pool state", ["field"], multiprocess_mode="livesum")
+HASHING_POOL_CALLS = Counter("hashing_pool_calls", "Password hashing pool calls by outcome", ["outcome"])
+CACHE = Gauge("auth_cache", "In-process cache size", ["cache", "field"], multiprocess_mode="livesum")
+CACHE_LOOKUPS = Counter("auth_cache_lookups", "In-process cache lookups by result", ["cache", "result"])
+
+# Per-request stage durations for the Server-Timing header; None when disabled.
+_server_timing: ContextVar[dict[str, float] | None] = ContextVar("server_timing", default=None)
+
+
+@contextmanager
+def observe(histogram: Histogram, stage: str) -> Iterator[None]:
+    """Time a block into an already-labelled histogram and the request's Server-Timing stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed)
+        timings = _server_timing.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def instrument_queries(cls):
+    """Time every public coroutine method of a repository class as a query."""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _timed_query(method, name))
+    return cls
+
+
+def _timed_query(method, name: str):
+    histogram = QUERY_LATENCY.labels(name)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with observe(histogram, "db"):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+def set_gauges(gauge: Gauge, stats: dict, *labels: str) -> None:
+    for field, value in stats.items():
+        if isinstance(value, (int, float)):
+            gauge.labels(*labels, field).set(value)
+
+
+# Last cumulative total seen per counter child, so sampled totals can be turned into increments.
+_counter_totals: dict[Counter, float] = {}
+
+
+def advance_counter(counter: Counter, total: float, *labels: str) -> None:
+    """Advance a counter to a cumulative ``total`` sampled from its source."""
+    child = counter.labels(*labels)
+    delta = total - _counter_totals.get(child, 0)
+    _counter_totals[child] = total
+    # A source that was reset (a cleared cache) starts over; the counter must not go down.
+    if delta > 0:
+        child.inc(delta)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, server_timing: bool = settings.SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = {} if self.server_timing else None
+        token = _server_timing.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings is not None:
+                    total = time.perf_counter() - start
+                    entries = [f"{stage};dur={duration * 1000:.2f}" for stage, duration in timings.items()]
+                    entries.append(f"total;dur={total * 1000:.2f}")
+                    value = ", ".join(entries)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _server_timing.reset(token)
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"], route.path if route is not None else "unmatched", status_code
+            ).observe(time.perf_counter() - start)
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        body = generate_latest(registry)
+    else:
+        body = generate_latest()
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
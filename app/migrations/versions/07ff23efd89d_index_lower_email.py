@@ -0,0 +1,41 @@
+"""replace auth_user email index with a unique lower(email) index
+
+Revision ID: 07ff23efd89d
+Revises: ae2a23d067d2
+Create Date: 2026-10-18 12:41:09.117342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07ff23efd89d'
+down_revision: Union[str, None] = 'ae2a23d067d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lowercasing would break the old unique index (and the new one could not be built)
+    # while two accounts share an email up to case; those need merging by hand first.
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(email), string_agg(email, ', ' ORDER BY email) FROM auth_user "
+        "GROUP BY lower(email) HAVING count(*) > 1"
+    )).all()
+    if duplicates:
+        raise RuntimeError(
+            "auth_user has emails that differ only by case; resolve them before upgrading:\n"
+            + "\n".join(f"  {email}: {accounts}" for email, accounts in duplicates)
+        )
+    # Emails are stored lowercased by UserService.create; normalize any older rows.
+    op.execute("UPDATE auth_user SET email = lower(email) WHERE email <> lower(email)")
+    op.create_index('ix_auth_user_email_lower', 'auth_user', [sa.text('lower(email)')], unique=True)
+    op.drop_index('ix_auth_user_email', table_name='auth_user')
+
+
+def downgrade() -> None:
+    op.create_index('ix_auth_user_email', 'auth_user', ['email'], unique=True)
+    op.drop_index('ix_auth_user_email_lower', table_name='auth_user')
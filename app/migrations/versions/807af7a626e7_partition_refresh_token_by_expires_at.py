@@ -0,0 +1,88 @@
+"""range-partition refresh_token by expires_at
+
+Revision ID: 807af7a626e7
+Revises: 07ff23efd89d
+Create Date: 2026-10-18 15:42:55.204871
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '807af7a626e7'
+down_revision: Union[str, None] = '07ff23efd89d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Daily partitions from today up to here; later ones are created by the app's
+# refresh token sweeper (UserRepository.maintain_refresh_token_partitions).
+INITIAL_PARTITION_DAYS = 10
+
+
+def upgrade() -> None:
+    # Partitioned tables need the partition key in every unique constraint, so the
+    # primary key becomes (id, expires_at) and token_hash keeps a plain index:
+    # its values are SHA-256 digests of random tokens.
+    op.execute("""
+        CREATE TABLE refresh_token_partitioned (
+            id uuid NOT NULL,
+            user_id uuid NOT NULL,
+            token_hash varchar(64) NOT NULL,
+            expires_at timestamp NOT NULL
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    # Days and "now" come from the app's clock, like expires_at itself and the
+    # maintenance job, not from the server's current_date.
+    connection = op.get_bind()
+    now = datetime.datetime.now()
+    last_expiry = connection.scalar(sa.text("SELECT max(expires_at) FROM refresh_token"))
+    last_day = now.date() + datetime.timedelta(days=INITIAL_PARTITION_DAYS)
+    if last_expiry is not None:
+        last_day = max(last_day, last_expiry.date())
+    # No default partition: PostgreSQL cannot detach partitions CONCURRENTLY while one exists.
+    day = now.date()
+    while day <= last_day:
+        op.execute(
+            f"CREATE TABLE refresh_token_p{day:%Y%m%d} PARTITION OF refresh_token_partitioned "
+            f"FOR VALUES FROM ('{day}') TO ('{day + datetime.timedelta(days=1)}')"
+        )
+        day += datetime.timedelta(days=1)
+    # Expired tokens are not carried over.
+    connection.execute(sa.text("""
+        INSERT INTO refresh_token_partitioned (id, user_id, token_hash, expires_at)
+        SELECT id, user_id, token_hash, expires_at FROM refresh_token WHERE expires_at > :now
+    """), {"now": now})
+    op.drop_table('refresh_token')
+    op.rename_table('refresh_token_partitioned', 'refresh_token')
+    op.create_primary_key('refresh_token_pkey', 'refresh_token', ['id', 'expires_at'])
+    op.create_foreign_key(
+        'refresh_token_user_id_fkey', 'refresh_token', 'auth_user', ['user_id'], ['id'], ondelete='cascade'
+    )
+    op.create_index(op.f('ix_refresh_token_token_hash'), 'refresh_token', ['token_hash'], unique=False)
+    op.create_index('ix_refresh_token_user_id_expires_at', 'refresh_token', ['user_id', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.create_table('refresh_token_unpartitioned',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.get_bind().execute(sa.text("""
+        INSERT INTO refresh_token_unpartitioned (id, user_id, token_hash, expires_at)
+        SELECT id, user_id, token_hash, expires_at FROM refresh_token WHERE expires_at > :now
+    """), {"now": datetime.datetime.now()})
+    # Dropping the parent drops every partition with it.
+    op.drop_table('refresh_token')
+    op.rename_table('refresh_token_unpartitioned', 'refresh_token')
+    op.create_primary_key('refresh_token_pkey', 'refresh_token', ['id'])
+    op.create_foreign_key(
+        'refresh_token_user_id_fkey', 'refresh_token', 'auth_user', ['user_id'], ['id'], ondelete='cascade'
+    )
+    op.create_index(op.f('ix_refresh_token_token_hash'), 'refresh_token', ['token_hash'], unique=True)
+    op.create_index('ix_refresh_token_user_id_expires_at', 'refresh_token', ['user_id', 'expires_at'], unique=False)
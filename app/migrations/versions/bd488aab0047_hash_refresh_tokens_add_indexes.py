@@ -0,0 +1,36 @@
+"""hash refresh tokens, add refresh_token indexes
+
+Revision ID: bd488aab0047
+Revises: caef142d6779
+Create Date: 2026-10-18 10:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd488aab0047'
+down_revision: Union[str, None] = 'caef142d6779'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_token', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE refresh_token SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    op.alter_column('refresh_token', 'token_hash', nullable=False)
+    op.drop_column('refresh_token', 'token')
+    op.create_index(op.f('ix_refresh_token_token_hash'), 'refresh_token', ['token_hash'], unique=True)
+    op.create_index('ix_refresh_token_user_id_expires_at', 'refresh_token', ['user_id', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Plaintext tokens cannot be recovered from their digests; existing sessions are dropped.
+    op.drop_index('ix_refresh_token_user_id_expires_at', table_name='refresh_token')
+    op.drop_index(op.f('ix_refresh_token_token_hash'), table_name='refresh_token')
+    op.execute("DELETE FROM refresh_token")
+    op.add_column('refresh_token', sa.Column('token', sa.String(), nullable=False))
+    op.drop_column('refresh_token', 'token_hash')
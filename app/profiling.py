@@ -0,0 +1,163 @@
+"""Sampling profiler for live workers.
+
+A background thread wakes every ``interval`` seconds and records the Python
+stacks it finds in ``sys._current_frames()``. Nothing is hooked into the
+profiled code, so a 5 ms interval costs a few percent of one core while the
+profiler runs and nothing otherwise. Output uses the collapsed stack format
+("frame;frame;frame count" per line) read by flamegraph.pl and speedscope.
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+
+def collapse_stack(frame: FrameType | None, root: str) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Sample every thread except the profilers' own until stopped."""
+
+    skip_threads = ("stack-sampler", "request-profiler")
+
+    def __init__(self, interval: float = settings.PROFILING_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id, str(thread_id))
+                if name not in self.skip_threads:
+                    self.stacks[collapse_stack(frame, name)] += 1
+
+
+_profile_lock = asyncio.Lock()
+
+
+def profiler_busy() -> bool:
+    return _profile_lock.locked()
+
+
+async def profile_worker(seconds: float, interval: float = settings.PROFILING_INTERVAL) -> str:
+    """Sample this worker for ``seconds`` and return collapsed stacks; one run at a time."""
+    async with _profile_lock:
+        sampler = StackSampler(interval)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        return format_collapsed(sampler.stacks)
+
+
+class RequestProfiler:
+    """Attribute event loop samples to the request task that was running.
+
+    Only the loop thread is sampled, and only while the task that the loop is
+    currently stepping belongs to a profiled request, so concurrent requests
+    do not bleed into each other. Work handed to other threads (password
+    hashing) shows up as time spent awaiting it; use the worker profile for that.
+    """
+
+    def __init__(self, interval: float = settings.PROFILING_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.requests = 0
+        self._tasks: dict[asyncio.Task, str] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def track(self, task: asyncio.Task, label: str) -> None:
+        with self._lock:
+            self._tasks[task] = label
+            self.requests += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = task.get_loop()
+                self._loop_thread_id = threading.get_ident()
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def untrack(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._tasks.pop(task, None)
+
+    def reset(self) -> str:
+        with self._lock:
+            output = format_collapsed(self.stacks)
+            self.stacks = Counter()
+            self.requests = 0
+        return output
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._tasks:
+                    self._thread = None
+                    return
+                label = self._tasks.get(asyncio.current_task(self._loop))
+                if label is None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                self.stacks[collapse_stack(frame, label)] += 1
+
+
+request_profiler = RequestProfiler()
+
+
+class ProfilingMiddleware:
+    """Profile a random ``sample_rate`` fraction of requests into ``request_profiler``."""
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            sample_rate: float = settings.PROFILING_REQUEST_SAMPLE_RATE,
+            profiler: RequestProfiler = request_profiler,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.profiler.track(task, f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.untrack(task)
@@ -0,0 +1,156 @@
+"""Optional OpenTelemetry tracing.
+
+Disabled unless ``TRACING_ENABLED`` is set, in which case the opentelemetry
+packages must be installed. While disabled, ``span`` returns a shared no-op
+context manager and ``trace_methods`` leaves classes untouched, so the hot path
+pays nothing for it.
+"""
+import contextlib
+import functools
+import inspect
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+_tracer = None
+_provider = None
+_no_span = contextlib.nullcontext()
+
+# Finished spans when TRACING_EXPORTER is "memory"; see setup_tracing.
+memory_exporter = None
+
+
+def span(name: str, **attributes):
+    if _tracer is None:
+        return _no_span
+    return _tracer.start_as_current_span(name, attributes=attributes or None)
+
+
+def trace_methods(cls):
+    """Wrap every public function and coroutine method of a class in a span named ``Class.method``."""
+    if not settings.TRACING_ENABLED:
+        return cls
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if inspect.iscoroutinefunction(method):
+            setattr(cls, name, _traced_coroutine(method, f"{cls.__name__}.{name}"))
+        elif inspect.isfunction(method) and not inspect.isasyncgenfunction(method):
+            setattr(cls, name, _traced_function(method, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _traced_coroutine(method, span_name: str):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with span(span_name):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+def _traced_function(method, span_name: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with span(span_name):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def build_span_exporter(kind: str):
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    if kind == "memory":
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+        return InMemorySpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+def setup_tracing(*engines) -> None:
+    """Install the tracer provider and statement spans on ``engines``; call once per worker."""
+    global _tracer, _provider, memory_exporter
+    if not settings.TRACING_ENABLED or _provider is not None:
+        return
+    from opentelemetry import trace
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    exporter = build_span_exporter(settings.TRACING_EXPORTER)
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    if settings.TRACING_EXPORTER == "otlp":
+        _provider.add_span_processor(BatchSpanProcessor(exporter))
+    else:
+        _provider.add_span_processor(SimpleSpanProcessor(exporter))
+    if settings.TRACING_EXPORTER == "memory":
+        memory_exporter = exporter
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("app")
+    SQLAlchemyInstrumentor().instrument(
+        engines=[engine.sync_engine for engine in engines], tracer_provider=_provider
+    )
+
+
+def shutdown_tracing() -> None:
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+class TracingMiddleware:
+    """Open a server span per request, continuing any incoming W3C trace context."""
+
+    def __init__(self, app: ASGIApp):
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind, StatusCode
+
+        self.app = app
+        self.propagate = propagate
+        self.server_kind = SpanKind.SERVER
+        self.error_status = StatusCode.ERROR
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=self.propagate.extract(carrier),
+            kind=self.server_kind,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    current.update_name(f"{method} {route.path}")
+                    current.set_attribute("http.route", route.path)
+                current.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    current.set_status(self.error_status)
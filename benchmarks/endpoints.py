@@ -0,0 +1,231 @@
+"""In-process load benchmark for the auth endpoints.
+
+Usage:
+    python -m benchmarks.endpoints --scenario mixed --requests 2000 --concurrency 32 \\
+        --output benchmarks/results/mixed.json [--baseline benchmarks/results/mixed.json]
+
+The app is driven through httpx's ASGI transport, so no server is started.
+``--db-url`` defaults to a throwaway SQLite file; pass a Postgres URL
+(``postgresql+asyncpg://...``) to benchmark against a real database. With
+SQLite the refresh tokens go to the in-memory token store, because refresh
+rotation relies on a Postgres data-modifying CTE.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+SCENARIOS = {
+    "login": {"login": 1.0},
+    "refresh": {"refresh": 1.0},
+    "me": {"me": 1.0},
+    "mixed": {"me": 0.80, "refresh": 0.12, "login": 0.06, "register": 0.02},
+}
+PASSWORD = "Benchmark1"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    return parser.parse_args()
+
+
+def configure_environment(db_url: str) -> None:
+    # Must run before anything under app/ is imported: settings are read at import time.
+    # All virtual users share one client address, so rate limits are off unless set explicitly.
+    for name in ("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_PER_ACCOUNT", "REGISTER_RATE_LIMIT_PER_IP",
+                 "REGISTER_RATE_LIMIT_PER_ACCOUNT"):
+        os.environ.setdefault(name, "0")
+    if db_url.startswith("sqlite"):
+        os.environ.setdefault("TOKEN_STORE", "memory")
+
+
+async def prepare_database(db_url: str, users: int):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.auth.models import User, UserRole
+    from app.auth.utils import Hasher
+    from app.database import Base
+
+    connect_args = {"timeout": 30} if db_url.startswith("sqlite") else {}
+    engine = create_async_engine(db_url, connect_args=connect_args)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    if db_url.startswith("postgresql"):
+        # create_all only creates the partitioned parent; the migration adds the partitions.
+        from app.auth.repositories import UserRepository
+
+        async with session_maker() as session:
+            await UserRepository(session).maintain_refresh_token_partitions()
+    hashed_password = Hasher.get_password_hash(PASSWORD)
+    emails = [f"bench{i}@example.com" for i in range(users)]
+    async with session_maker() as session:
+        session.add_all(
+            User(
+                email=email,
+                phone_number=f"9{i:09d}",
+                hashed_password=hashed_password,
+                role=UserRole.base_user,
+            )
+            for i, email in enumerate(emails)
+        )
+        await session.commit()
+    return engine, session_maker, emails
+
+
+def percentile(quantiles: list[float], p: int) -> float:
+    return quantiles[p - 1] if quantiles else 0.0
+
+
+def summarize(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint, latencies in sorted(samples.items()):
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors.get(endpoint, 0),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(quantiles, 50) * 1000,
+            "p95_ms": percentile(quantiles, 95) * 1000,
+            "p99_ms": percentile(quantiles, 99) * 1000,
+        }
+    return endpoints
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace, db_url: str) -> dict:
+    import httpx
+
+    from app import database
+    from app.database import get_async_session
+    from app.main import app
+
+    engine, session_maker, emails = await prepare_database(db_url, args.users)
+    # The sliding-session middleware and the outbox open their own sessions from the shared
+    # session maker, which the app lifespan would otherwise bind; ASGITransport skips the lifespan.
+    database.async_session_maker.configure(bind=engine)
+
+    async def get_bench_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_bench_session
+    rng = random.Random(args.seed)
+    weights = SCENARIOS[args.scenario]
+    plan = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    registered = iter(range(10 ** 9))
+
+    async def call(client: httpx.AsyncClient, action: str, email: str) -> None:
+        start = time.perf_counter()
+        if action == "login":
+            response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        elif action == "refresh":
+            response = await client.post("/auth/refresh")
+        elif action == "me":
+            response = await client.get("/auth/me")
+        else:
+            n = next(registered)
+            response = await client.post("/auth/register", json={
+                "email": f"new{args.seed}-{n}@example.com",
+                "phone_number": f"8{n:09d}",
+                "password": PASSWORD,
+                "role": "base_user",
+            })
+        samples[action].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[action] += 1
+
+    async def virtual_user(index: int, actions: list[str]) -> None:
+        email = emails[index % len(emails)]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Warm-up login so refresh and /me have cookies; not part of the measurement.
+            await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+            for action in actions:
+                await call(client, action, email)
+
+    chunks = [plan[i::args.concurrency] for i in range(args.concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i, chunk) for i, chunk in enumerate(chunks)))
+    elapsed = time.perf_counter() - start
+    database.async_session_maker.configure(bind=None)
+    await engine.dispose()
+    return {
+        "scenario": args.scenario,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "database": db_url.split("://")[0],
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "elapsed_s": elapsed,
+        "total_rps": args.requests / elapsed,
+        "endpoints": summarize(samples, errors, elapsed),
+    }
+
+
+def print_report(result: dict, baseline: dict | None) -> None:
+    print(f"scenario={result['scenario']} requests={result['requests']} concurrency={result['concurrency']} "
+          f"db={result['database']} rps={result['total_rps']:.1f}")
+    print(f"{'endpoint':<10}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:<10}{stats['requests']:>8}{stats['errors']:>8}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+        previous = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if previous:
+            deltas = [
+                f"{key} {(stats[key] - previous[key]) / previous[key] * 100:+.1f}%"
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+                if previous[key]
+            ]
+            print(f"{'':<10}vs baseline {baseline.get('revision')}: " + ", ".join(deltas))
+
+
+def main() -> None:
+    args = parse_args()
+    tmpdir = None
+    db_url = args.db_url
+    if db_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    configure_environment(db_url)
+    result = asyncio.run(run(args, db_url))
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print_report(result, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
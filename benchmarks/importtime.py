@@ -0,0 +1,67 @@
+"""Import-time report for the app against a startup budget.
+
+Usage: python -m benchmarks.importtime [--module app.main] [--runs 5] [--top 15] [--budget-ms 1000]
+
+Imports ``--module`` in fresh interpreters under ``python -X importtime`` and
+prints the median total import time plus the slowest top-level packages and
+app modules. Exits with status 1 when the median exceeds ``--budget-ms``.
+With ``gunicorn --preload`` (app.sh) this cost is paid once by the master
+rather than once per worker.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Return {module: (self_us, cumulative_us)} from one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    totals = []
+    packages: dict[str, list[int]] = defaultdict(list)
+    app_modules: dict[str, list[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        times = import_times(args.module)
+        totals.append(times[args.module][1])
+        by_package: dict[str, int] = defaultdict(int)
+        for name, (self_us, _) in times.items():
+            by_package[name.split(".")[0]] += self_us
+            if name.split(".")[0] == "app":
+                app_modules[name].append(self_us)
+        for package, self_us in by_package.items():
+            packages[package].append(self_us)
+
+    total_ms = statistics.median(totals) / 1000
+    print(f"import {args.module}: median {total_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for package, samples in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:args.top]:
+        print(f"{package:<32}{statistics.median(samples) / 1000:>10.1f}")
+    print(f"\n{'app module':<32}{'self ms':>10}")
+    for name, samples in sorted(app_modules.items(), key=lambda item: -statistics.median(item[1]))[:args.top]:
+        print(f"{name:<32}{statistics.median(samples) / 1000:>10.1f}")
+    return 1 if total_ms > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Encode/decode throughput of the access token codec per algorithm.
+
+Usage: python -m benchmarks.jwt_codecs [--number N]
+
+Compares KeyRing (PyJWT with keys parsed once) against PyJWT given the raw
+secret/PEM on every call, and against python-jose when it is installed.
+"""
+import argparse
+import tempfile
+import time
+import timeit
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from app.auth.keys import KeyRing, generate_key
+
+ALGORITHMS = ["HS256", "ES256", "EdDSA", "RS256"]
+SECRET = "benchmark-secret-benchmark-secret"
+
+
+def make_claims() -> dict:
+    return {"sub": "user@example.com", "role": "base_user", "jti": "x" * 22, "exp": int(time.time()) + 600}
+
+
+def bench(func, number: int) -> float:
+    return number / timeit.timeit(func, number=number)
+
+
+def run(algorithm: str, keys_dir: str, number: int) -> list[tuple[str, float, float]]:
+    if algorithm.startswith("HS"):
+        key_ring = KeyRing(algorithm, SECRET)
+        signing_key = verification_key = SECRET
+    else:
+        kid = generate_key(keys_dir, algorithm)
+        key_ring = KeyRing(algorithm, SECRET, keys_dir, kid)
+        with open(f"{keys_dir}/{kid}.pem") as pem:
+            signing_key = pem.read()
+        verification_key = key_ring.public_keys[kid]
+    claims = make_claims()
+    token = key_ring.encode(claims)
+    rows = [(
+        "keyring",
+        bench(lambda: key_ring.encode(claims), number),
+        bench(lambda: key_ring.decode(token), number),
+    ), (
+        "pyjwt-raw",
+        bench(lambda: jwt.encode(claims, signing_key, algorithm=algorithm), number),
+        bench(lambda: jwt.decode(token, verification_key, algorithms=[algorithm]), number),
+    )]
+    try:
+        from jose import jwt as jose_jwt
+    except ImportError:
+        return rows
+    if algorithm in ("HS256", "ES256", "RS256"):
+        jose_token = jose_jwt.encode(claims, signing_key, algorithm=algorithm)
+        jose_verification_key = SECRET
+        if not algorithm.startswith("HS"):
+            jose_verification_key = verification_key.public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode()
+        rows.append((
+            "python-jose",
+            bench(lambda: jose_jwt.encode(claims, signing_key, algorithm=algorithm), number),
+            bench(lambda: jose_jwt.decode(jose_token, jose_verification_key, algorithms=[algorithm]), number),
+        ))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    print(f"{'algorithm':<10}{'codec':<14}{'encode/s':>12}{'decode/s':>12}")
+    with tempfile.TemporaryDirectory() as keys_dir:
+        for algorithm in ALGORITHMS:
+            for codec, encode_rate, decode_rate in run(algorithm, keys_dir, args.number):
+                print(f"{algorithm:<10}{codec:<14}{encode_rate:>12.0f}{decode_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
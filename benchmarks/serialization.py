@@ -0,0 +1,117 @@
+"""Per-request CPU of response serialization and the /auth/me profile lookup.
+
+Usage: python -m benchmarks.serialization [--number N] [--db-url URL]
+
+Each row compares the generic FastAPI path (validate the return value against
+the response model, jsonable output, JSONResponse) with the fast path the
+handlers use now. The profile lookup runs against ``--db-url``, a throwaway
+SQLite database by default, and is measured in process CPU time.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import timeit
+import uuid
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.auth.models import User, UserRole
+from app.auth.responses import StatusResponse, UserResponse, success_response
+
+EMAIL = "bench@example.com"
+
+
+def make_user() -> User:
+    return User(
+        id=uuid.uuid4(), email=EMAIL, phone_number="9000000000", hashed_password="x",
+        role=UserRole.base_user, is_active=True, is_superuser=False, is_verified=False,
+    )
+
+
+def generic_response(field, value) -> JSONResponse:
+    # serialize_response never suspends for coroutine endpoints, so drive it without an event loop.
+    coroutine = serialize_response(field=field, response_content=value, is_coroutine=True)
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return JSONResponse(stop.value)
+    raise RuntimeError("serialize_response suspended")
+
+
+def per_call_us(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def serialization_rows(number: int) -> list[tuple[str, float, float]]:
+    status_field = create_response_field("status", StatusResponse)
+    user_field = create_response_field("user", UserResponse)
+    profile = UserResponse.model_validate(make_user())
+    return [
+        (
+            "status body",
+            per_call_us(lambda: generic_response(status_field, StatusResponse), number),
+            per_call_us(success_response, number),
+        ),
+        (
+            "/me body",
+            per_call_us(lambda: generic_response(user_field, profile), number),
+            per_call_us(lambda: Response(profile.model_dump_json(), media_type="application/json"), number),
+        ),
+    ]
+
+
+async def profile_lookup_row(db_url: str, number: int) -> tuple[str, float, float]:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.auth.repositories import UserRepository
+    from app.database import Base
+
+    engine = create_async_engine(db_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add(make_user())
+        await session.commit()
+
+    async def orm_entity(repository: UserRepository) -> UserResponse:
+        return UserResponse.model_validate(await repository.get_by_email(EMAIL))
+
+    async def projection(repository: UserRepository) -> UserResponse:
+        return UserResponse.model_validate(await repository.get_profile_by_email(EMAIL))
+
+    timings = []
+    for lookup in (orm_entity, projection):
+        async with session_maker() as session:
+            repository = UserRepository(session)
+            await lookup(repository)
+            start = time.process_time()
+            for _ in range(number):
+                await lookup(repository)
+                session.expunge_all()
+            timings.append((time.process_time() - start) / number * 1e6)
+    await engine.dispose()
+    return ("/me lookup", *timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    rows = serialization_rows(args.number)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{tmpdir}/bench.db"
+        rows.append(asyncio.run(profile_lookup_row(db_url, args.number // 5)))
+    print(f"{'stage':<14}{'generic us':>12}{'fast us':>10}{'saved us':>10}")
+    for name, generic, fast in rows:
+        print(f"{name:<14}{generic:>12.1f}{fast:>10.1f}{generic - fast:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import gc
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    from app.config import settings
+
+    if settings.TOKEN_STORE == "memory" and server.cfg.workers > 1:
+        raise RuntimeError(
+            "TOKEN_STORE=memory keeps refresh tokens per process; use one worker or a shared store"
+        )
+    if settings.RATE_LIMIT_BACKEND == "memory" and server.cfg.workers > 1:
+        raise RuntimeError(
+            "RATE_LIMIT_BACKEND=memory counts per process, multiplying every limit by the worker count; "
+            "use one worker or RATE_LIMIT_BACKEND=redis"
+        )
+
+
+def when_ready(server):
+    # With --preload the app is already imported here, before any worker forks.
+    if server.cfg.preload_app:
+        from app.auth.utils import warm_up
+
+        warm_up()
+        # Keep the collector from touching (and so copying) the master's objects in every worker.
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the shared metrics directory.
+    multiprocess.mark_process_dead(worker.pid)
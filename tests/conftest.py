@@ -0,0 +1,93 @@
+import os
+
+# Settings are read at import time: cheap hashes, and no rate limits for a single test client address.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+for name in ("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_PER_ACCOUNT", "REGISTER_RATE_LIMIT_PER_IP",
+             "REGISTER_RATE_LIMIT_PER_ACCOUNT"):
+    os.environ.setdefault(name, "0")
+
+import httpx
+import pytest
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.auth import models
+from app.auth.cache import TTLCache
+from app.auth.repositories import UserRepository
+from app.auth.token_store import MemoryTokenStore
+from app.config import settings
+from app.database import Base, RoutingSession, get_async_session
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def pg_engine():
+    """A fresh schema on ``settings.TEST_DB_URL``; tests using it skip when that server is unreachable."""
+    engine = create_async_engine(settings.TEST_DB_URL)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        # create_all only creates the partitioned parent; the migration adds the partitions.
+        async with AsyncSession(engine) as session:
+            await UserRepository(session).maintain_refresh_token_partitions()
+    except (OSError, DBAPIError) as error:
+        await engine.dispose()
+        pytest.skip(f"test database unavailable: {error}")
+    yield engine
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+def pg_session_maker(pg_engine):
+    return async_sessionmaker(pg_engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest.fixture
+async def sqlite_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(sqlite_engine, monkeypatch):
+    """The app on SQLite with the in-memory token store (the rotation statement needs Postgres)."""
+    from app.auth.services import user_cache
+    from app.main import app
+
+    monkeypatch.setattr(UserRepository, "token_store", MemoryTokenStore())
+    monkeypatch.setattr(UserRepository, "sticky_reads", TTLCache())
+    user_cache.clear()
+    # The sliding-session middleware opens its own sessions from the shared session maker.
+    database.async_session_maker.configure(bind=sqlite_engine)
+
+    async def get_test_session():
+        async with database.async_session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_test_session
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+    database.async_session_maker.configure(bind=None)
+
+
+@pytest.fixture
+def user() -> models.User:
+    """An unsaved base user."""
+    return models.User(
+        email="user@example.com",
+        phone_number="9000000000",
+        hashed_password="x",
+        role=models.UserRole.base_user,
+    )
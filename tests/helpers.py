@@ -0,0 +1,22 @@
+"""Client helpers shared by the API tests."""
+
+CREDENTIALS = {"email": "session@example.com", "password": "Passw0rdX"}
+
+
+async def register(client) -> None:
+    response = await client.post("/auth/register", json={
+        **CREDENTIALS, "phone_number": "9000000001", "role": "base_user",
+    })
+    assert response.status_code == 201
+
+
+async def log_in(client) -> dict[str, str]:
+    response = await client.post("/auth/login", json=CREDENTIALS)
+    assert response.status_code == 200
+    cookies = dict(client.cookies)
+    client.cookies.clear()
+    return cookies
+
+
+def cookie_header(cookies: dict[str, str]) -> dict[str, str]:
+    return {"Cookie": "; ".join(f"{name}={value}" for name, value in cookies.items())}
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.exceptions import ErrorCode
+from app.auth.models import User
+from tests.helpers import cookie_header, log_in, register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def superuser_cookies(client, sqlite_engine) -> dict[str, str]:
+    await register(client)
+    async with AsyncSession(sqlite_engine) as session:
+        await session.execute(update(User).values(is_superuser=True))
+        await session.commit()
+    return await log_in(client)
+
+
+@pytest.mark.parametrize("query", ["after=00000000-0000-0000-0000-000000000000", "limit=1"])
+async def test_stream_rejects_page_parameters(client, superuser_cookies, query):
+    response = await client.get(f"/auth/admin/users?stream=true&{query}", headers=cookie_header(superuser_cookies))
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": ErrorCode.STREAM_NOT_PAGINATED}
+
+
+async def test_stream_returns_every_user(client, superuser_cookies):
+    response = await client.get("/auth/admin/users?stream=true", headers=cookie_header(superuser_cookies))
+
+    assert response.status_code == 200
+    assert [json.loads(line)["email"] for line in response.text.splitlines()] == ["session@example.com"]
+
+
+async def test_page_without_a_limit_lists_users(client, superuser_cookies):
+    response = await client.get("/auth/admin/users", headers=cookie_header(superuser_cookies))
+
+    assert response.status_code == 200
+    assert [item["email"] for item in response.json()["items"]] == ["session@example.com"]
+    assert response.json()["next_cursor"] is None
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from app.auth.bulk import parse_rows
+from app.auth.utils import Hasher
+
+pytestmark = pytest.mark.anyio
+
+ROW = {"email": "import@example.com", "phone_number": "9000000002", "role": "base_user"}
+
+
+async def parsed(*rows: dict) -> list[tuple[int, dict | None, str | None]]:
+    async def lines():
+        for row in rows:
+            yield json.dumps(row)
+
+    return [result async for result in parse_rows(lines(), "jsonl")]
+
+
+async def test_unrecognized_password_hash_is_a_row_error():
+    hashed_password = Hasher.get_password_hash("Passw0rdX")
+
+    (_, valid, _), (line, row, error) = await parsed(
+        {**ROW, "hashed_password": hashed_password}, {**ROW, "hashed_password": "garbage"},
+    )
+
+    assert valid["hashed_password"] == hashed_password
+    assert (line, row, error) == (2, None, "hashed_password: Value error, Unrecognized password hash format")
+
+
+async def test_row_errors_do_not_echo_the_input():
+    [(_, row, error)] = await parsed({**ROW, "password": "secretpw"})
+
+    assert row is None
+    assert "Password must contain at least one uppercase letter" in error
+    assert "secretpw" not in error
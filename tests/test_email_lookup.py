@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from sqlalchemy import event, text
+
+from app.auth.repositories import UserRepository
+
+pytestmark = pytest.mark.anyio
+
+SEED_USERS = """
+INSERT INTO auth_user (id, email, phone_number, hashed_password, role, is_active, is_verified, is_superuser)
+SELECT gen_random_uuid(), 'user' || n || '@example.com', lpad(n::text, 10, '0'), 'x', 'base_user', true, false, false
+FROM generate_series(1, :users) AS n
+"""
+
+
+def index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+async def test_get_by_email_uses_the_lower_email_index(pg_engine, pg_session_maker):
+    async with pg_engine.begin() as connection:
+        await connection.execute(text(SEED_USERS), {"users": 50_000})
+        await connection.execute(text("ANALYZE auth_user"))
+
+    # Explain the parameterized statement get_by_email actually sends, not a hand-written copy.
+    executed = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(pg_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with pg_session_maker() as session:
+            user = await UserRepository(session).get_by_email("User25000@Example.com")
+    finally:
+        event.remove(pg_engine.sync_engine, "before_cursor_execute", capture)
+    assert user is not None
+    (statement, parameters), = executed
+
+    async with pg_engine.connect() as connection:
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    assert "ix_auth_user_email_lower" in index_names(plan[0]["Plan"]), json.dumps(plan, indent=2)
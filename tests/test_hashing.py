@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.exceptions import HashingPoolSaturated
+from app.auth.models import User
+from app.auth.utils import Hasher, HashingPool, build_crypt_context
+from tests.helpers import CREDENTIALS, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_saturated_hashing_pool_rejects_with_retry_after(client, monkeypatch):
+    pool = HashingPool(max_workers=1, max_pending=1)
+    pool._pending = pool.max_pending
+    monkeypatch.setattr(Hasher, "pool", pool)
+
+    response = await client.post("/auth/register", json={
+        **CREDENTIALS, "phone_number": "9000000001", "role": "base_user",
+    })
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert pool.stats()["rejected"] == 1
+
+
+async def test_login_rehashes_a_password_with_an_outdated_scheme(client, sqlite_engine, monkeypatch):
+    await register(client)
+    monkeypatch.setattr(Hasher, "pwd_context", build_crypt_context(scheme="argon2", argon2_memory_cost=1024))
+
+    assert (await client.post("/auth/login", json=CREDENTIALS)).status_code == 200
+
+    async with AsyncSession(sqlite_engine) as session:
+        hashed_password = await session.scalar(select(User.hashed_password))
+    assert hashed_password.startswith("$argon2id$")
+    assert Hasher.verify_password(CREDENTIALS["password"], hashed_password)
+
+
+async def test_cancelled_callers_keep_their_slot_until_the_hash_finishes():
+    pool = HashingPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+    caller = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+
+    caller.cancel()
+    await asyncio.sleep(0.01)
+    with pytest.raises(HashingPoolSaturated):
+        await pool.run(int)
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
+
+
+async def test_failed_hashes_are_not_counted_as_completed():
+    pool = HashingPool(max_workers=1, max_pending=1)
+
+    with pytest.raises(ValueError):
+        await pool.run(int, "not a number")
+    assert await pool.run(int, "1") == 1
+
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
@@ -0,0 +1,56 @@
+import time
+
+import jwt
+import pytest
+
+from app.auth.keys import KeyRing, generate_key
+
+
+@pytest.fixture
+def key_ring(tmp_path) -> KeyRing:
+    return KeyRing("ES256", "unused", str(tmp_path), generate_key(str(tmp_path), "ES256"))
+
+
+def claims(expires_in: int = 60) -> dict:
+    return {"sub": "user@example.com", "exp": int(time.time()) + expires_in}
+
+
+def test_decode_returns_the_claims(key_ring):
+    assert key_ring.decode(key_ring.encode(claims()))["sub"] == "user@example.com"
+
+
+def test_decode_rejects_expired_tokens(key_ring):
+    with pytest.raises(jwt.ExpiredSignatureError):
+        key_ring.decode(key_ring.encode(claims(expires_in=-60)))
+
+
+def test_decode_rejects_a_tampered_signature(key_ring):
+    header, payload, _ = key_ring.encode(claims()).split(".")
+    signature = key_ring.encode({**claims(), "sub": "other@example.com"}).split(".")[2]
+    with pytest.raises(jwt.InvalidSignatureError):
+        key_ring.decode(f"{header}.{payload}.{signature}")
+
+
+@pytest.mark.parametrize("algorithm, key", [("none", None), ("HS256", "guessed-secret")])
+def test_decode_rejects_other_algorithms(key_ring, algorithm, key):
+    token = jwt.encode(claims(), key, algorithm=algorithm, headers={"kid": key_ring.active_kid})
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        key_ring.decode(token)
+
+
+def test_decode_rejects_unknown_key_ids(key_ring, tmp_path):
+    stranger = KeyRing("ES256", "unused", str(tmp_path / "other"), generate_key(str(tmp_path / "other"), "ES256"))
+    with pytest.raises(jwt.InvalidKeyError):
+        key_ring.decode(stranger.encode(claims()))
+
+
+def test_decode_can_accept_expired_tokens(key_ring):
+    assert key_ring.decode(key_ring.encode(claims(expires_in=-60)), verify_exp=False)["sub"] == "user@example.com"
+
+
+def test_symmetric_keys_ignore_a_configured_kid():
+    key_ring = KeyRing("HS256", "s" * 32, None, "abc")
+    token = key_ring.encode(claims())
+
+    assert "kid" not in jwt.get_unverified_header(token)
+    assert key_ring.decode(token)["sub"] == "user@example.com"
@@ -0,0 +1,24 @@
+from prometheus_client import CollectorRegistry, Counter
+
+from app.database import PoolStats
+from app.metrics import advance_counter
+
+
+def test_counters_advance_by_the_growth_of_sampled_totals():
+    registry = CollectorRegistry()
+    counter = Counter("lookups", "Lookups", ["result"], registry=registry)
+
+    for total in (3, 5, 0, 2):  # The source was reset after 5.
+        advance_counter(counter, total, "hits")
+
+    assert registry.get_sample_value("lookups_total", {"result": "hits"}) == 7
+
+
+def test_pool_wait_max_covers_the_time_since_it_was_last_read():
+    stats = PoolStats()
+    stats.record_wait(0.5)
+
+    assert stats.take_wait_max() == 0.5
+    stats.record_wait(0.1)
+    assert stats.take_wait_max() == 0.1
+    assert stats.take_wait_max() == 0.0
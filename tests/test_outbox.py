@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import outbox as outbox_module
+from app.auth.models import OutboxEvent
+from app.auth.outbox import OutboxDispatcher, QueueSink
+from app.auth.repositories import UserRepository
+from tests.helpers import cookie_header, log_in, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def outbox(engine) -> list[OutboxEvent]:
+    async with AsyncSession(engine) as session:
+        return list(await session.scalars(select(OutboxEvent).order_by(OutboxEvent.id)))
+
+
+async def test_external_token_store_sessions_add_no_database_writes(client, sqlite_engine):
+    await register(client)
+    cookies = await log_in(client)
+    response = await client.post("/auth/refresh", headers=cookie_header(cookies))
+    assert response.status_code == 200
+
+    assert [event.event_type for event in await outbox(sqlite_engine)] == ["user.registered"]
+
+    await client.post("/auth/logout", headers=cookie_header(dict(response.cookies)))
+    assert [event.event_type for event in await outbox(sqlite_engine)] == ["user.registered", "session.ended"]
+
+
+async def logged_out_events(client) -> None:
+    await register(client)
+    await client.post("/auth/logout", headers=cookie_header(await log_in(client)))
+
+
+async def test_dispatcher_delivers_a_batch_and_deletes_it(client, sqlite_engine):
+    await logged_out_events(client)
+    sink = QueueSink(maxsize=10)
+
+    assert await OutboxDispatcher([sink], batch_size=10).dispatch_once() == 2
+
+    messages = [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+    assert [message["type"] for message in messages] == ["user.registered", "session.ended"]
+    assert await outbox(sqlite_engine) == []
+
+
+async def test_dispatcher_backs_off_when_a_sink_cannot_take_the_batch(client, sqlite_engine, monkeypatch):
+    # Take the top of the jitter range so the batch cannot become due again within the test.
+    monkeypatch.setattr(outbox_module.random, "uniform", lambda low, high: high)
+    await logged_out_events(client)
+    sink = QueueSink(maxsize=1)
+    dispatcher = OutboxDispatcher([sink], batch_size=10, backoff_base=60)
+
+    assert await dispatcher.dispatch_once() == 2
+
+    assert sink.queue.empty()
+    assert [event.attempts for event in await outbox(sqlite_engine)] == [1, 1]
+    assert await dispatcher.dispatch_once() == 0
+
+
+async def test_dispatcher_parks_events_after_the_last_attempt(client, sqlite_engine):
+    await logged_out_events(client)
+    dispatcher = OutboxDispatcher([QueueSink(maxsize=1)], batch_size=10, max_attempts=1)
+
+    await dispatcher.dispatch_once()
+
+    assert [event.next_attempt_at for event in await outbox(sqlite_engine)] == [None, None]
+
+
+async def test_bulk_import_records_an_event_per_inserted_user(pg_engine, pg_session_maker, user):
+    rows = [
+        {"email": user.email, "phone_number": user.phone_number, "hashed_password": "x", "role": user.role},
+        {"email": user.email, "phone_number": "9000000009", "hashed_password": "x", "role": user.role},
+    ]
+    async with pg_session_maker() as session:
+        assert await UserRepository(session).bulk_create(rows) == {user.email}
+
+    events = await outbox(pg_engine)
+    assert [(event.event_type, event.payload) for event in events] == [("user.registered", {"email": user.email})]
@@ -0,0 +1,50 @@
+import pytest
+
+from app.auth import rate_limit
+from app.auth.rate_limit import MemoryRateLimiter
+from app.config import settings
+from tests.helpers import register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [6000.0]  # The start of a 60 second window.
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+async def hits(limiter: MemoryRateLimiter, count: int) -> list[int]:
+    return [await limiter.hit("key", 10, 60) for _ in range(count)]
+
+
+async def test_retry_after_waits_for_the_window_to_end_when_it_is_full(clock):
+    limiter = MemoryRateLimiter()
+    clock[0] += 15
+
+    assert await hits(limiter, 11) == [0] * 10 + [45]
+
+
+async def test_retry_after_waits_for_the_previous_window_to_slide_out(clock):
+    limiter = MemoryRateLimiter()
+    await hits(limiter, 10)
+    clock[0] += 75  # A quarter into the next window: 10 * 0.75 of the previous still counts.
+
+    # Three fit under 10; the fourth must wait until 10 * weight + 3 < 10, just past 3 seconds.
+    assert await hits(limiter, 4) == [0, 0, 0, 4]
+    clock[0] += 4
+    assert await hits(limiter, 1) == [0]
+
+
+async def test_register_is_limited_per_account(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "rate_limiter", MemoryRateLimiter())
+    monkeypatch.setattr(settings, "REGISTER_RATE_LIMIT_PER_ACCOUNT", 1)
+    await register(client)
+
+    response = await client.post("/auth/register", json={
+        "email": "SESSION@example.com", "password": "Passw0rdX", "phone_number": "9000000002", "role": "base_user",
+    })
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
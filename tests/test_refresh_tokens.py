@@ -0,0 +1,66 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.auth.models import RefreshToken, RevokedToken
+from app.auth.repositories import UserRepository
+from app.auth.utils import Hasher
+
+pytestmark = pytest.mark.anyio
+
+
+class DatabaseTokenRepository(UserRepository):
+    token_store = None
+
+
+async def test_concurrent_rotation_consumes_the_token_once(pg_session_maker, user):
+    async with pg_session_maker() as session:
+        session.add(user)
+        await session.commit()
+        await DatabaseTokenRepository(session).add_refresh_token(user.id, "original")
+
+    async def rotate(successor: str):
+        async with pg_session_maker() as session:
+            return await DatabaseTokenRepository(session).rotate_refresh_token("original", successor)
+
+    results = await asyncio.gather(rotate("first"), rotate("second"))
+
+    owner = {"id": user.id, "email": user.email, "role": user.role}
+    assert sorted(results, key=lambda result: result is None) == [owner, None]
+    async with pg_session_maker() as session:
+        token_hashes = list(await session.scalars(select(RefreshToken.token_hash)))
+    assert len(token_hashes) == 1
+    assert token_hashes[0] in {Hasher.hash_token("first"), Hasher.hash_token("second")}
+
+
+async def test_revoke_session_deletes_the_refresh_token_with_the_revocation(sqlite_engine, user):
+    session_maker = async_sessionmaker(sqlite_engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add(user)
+        await session.commit()
+        repository = DatabaseTokenRepository(session)
+        await repository.add_refresh_token(user.id, "original")
+        await repository.revoke_session("original", "jti", datetime.datetime.now(), user.email)
+
+        assert list(await session.scalars(select(RefreshToken))) == []
+        assert [token.jti for token in await session.scalars(select(RevokedToken))] == ["jti"]
+
+
+async def test_maintenance_drops_expired_partitions_and_creates_upcoming_ones(pg_engine, pg_session_maker):
+    today = datetime.date.today()
+    yesterday, missing = today - datetime.timedelta(days=1), today + datetime.timedelta(days=3)
+    async with pg_engine.begin() as connection:
+        await connection.execute(text(
+            f"CREATE TABLE refresh_token_p{yesterday:%Y%m%d} PARTITION OF refresh_token "
+            f"FOR VALUES FROM ('{yesterday}') TO ('{today}')"
+        ))
+        await connection.execute(text(f"DROP TABLE refresh_token_p{missing:%Y%m%d}"))
+
+    async with pg_session_maker() as session:
+        created, dropped = await UserRepository(session).maintain_refresh_token_partitions(days_ahead=5)
+
+    assert dropped == [f"refresh_token_p{yesterday:%Y%m%d}"]
+    assert created == [f"refresh_token_p{missing:%Y%m%d}"]
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.auth.exceptions import EmailTaken, ErrorCode, PhoneNumberTaken
+from app.auth.models import User
+from app.auth.repositories import UserRepository
+from tests.helpers import CREDENTIALS, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def register_again(client, **changes) -> dict:
+    response = await client.post("/auth/register", json={
+        **CREDENTIALS, "phone_number": "9000000002", "role": "base_user", **changes,
+    })
+    assert response.status_code == 400
+    return response.json()
+
+
+async def test_email_differing_only_by_case_is_taken(client):
+    await register(client)
+
+    assert await register_again(client, email=CREDENTIALS["email"].upper()) == {"detail": ErrorCode.EMAIL_TAKEN}
+
+
+async def test_phone_number_is_taken(client):
+    await register(client)
+
+    assert await register_again(client, email="other@example.com", phone_number="9000000001") == {
+        "detail": ErrorCode.PHONE_NUMBER_TAKEN
+    }
+
+
+@pytest.mark.parametrize("column, exception", [("email", EmailTaken), ("phone_number", PhoneNumberTaken)])
+async def test_concurrent_registrations_create_one_user(pg_session_maker, user, column, exception):
+    rows = [
+        {"email": user.email, "phone_number": user.phone_number, "hashed_password": "x", "role": user.role},
+        {"email": "other@example.com", "phone_number": "9000000009", "hashed_password": "x", "role": user.role},
+    ]
+    rows[1][column] = rows[0][column]
+
+    async def create(row: dict):
+        async with pg_session_maker() as session:
+            return await UserRepository(session).create(row)
+
+    results = await asyncio.gather(*(create(row) for row in rows), return_exceptions=True)
+
+    assert {type(result) for result in results} == {User, exception}
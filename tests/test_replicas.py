@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.auth.cache import TTLCache
+from app.auth.models import User, UserRole
+from app.auth.repositories import UserRepository
+from app.database import Base, ReplicaSet, RoutingSession
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(sqlite_engine, replica_engine, monkeypatch):
+    """Sessions on the primary that route marked reads to ``replica_engine``.
+
+    The two databases are not replicated, so which one answered a read shows where it was routed.
+    """
+    monkeypatch.setattr(RoutingSession, "replicas", ReplicaSet([replica_engine]))
+    monkeypatch.setattr(UserRepository, "sticky_reads", TTLCache())
+    return async_sessionmaker(
+        sqlite_engine, expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutingSession
+    )
+
+
+def make_user(email: str, phone_number: str) -> User:
+    return User(email=email, phone_number=phone_number, hashed_password="x", role=UserRole.base_user)
+
+
+async def add_user(engine, user: User) -> None:
+    async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+        session.add(user)
+        await session.commit()
+
+
+async def test_reads_go_to_the_replica(session_maker, sqlite_engine, replica_engine):
+    await add_user(sqlite_engine, make_user("primary@example.com", "9000000001"))
+    await add_user(replica_engine, make_user("replica@example.com", "9000000002"))
+
+    async with session_maker() as session:
+        users = await UserRepository(session).list_users()
+
+    assert [user["email"] for user in users] == ["replica@example.com"]
+
+
+async def test_missing_replica_row_falls_back_to_the_primary(session_maker, sqlite_engine):
+    await add_user(sqlite_engine, make_user("lagging@example.com", "9000000001"))
+
+    async with session_maker() as session:
+        user = await UserRepository(session).get_by_email("lagging@example.com")
+
+    assert user is not None
+
+
+async def test_recent_writes_are_read_from_the_primary(session_maker, replica_engine):
+    # The replica still has an older row for the same email.
+    await add_user(replica_engine, make_user("sticky@example.com", "9000000009"))
+    async with session_maker() as session:
+        await UserRepository(session).create({
+            "email": "sticky@example.com", "phone_number": "9000000001",
+            "hashed_password": "x", "role": UserRole.base_user,
+        })
+
+    async with session_maker() as session:
+        repository = UserRepository(session)
+        user = await repository.get_by_email("sticky@example.com")
+        profile = await repository.get_profile_by_email("sticky@example.com")
+
+    assert user.phone_number == "9000000001"
+    assert profile["phone_number"] == "9000000001"
+
+
+async def test_session_stays_on_the_primary_after_a_write(session_maker, replica_engine):
+    await add_user(replica_engine, make_user("replica@example.com", "9000000002"))
+
+    async with session_maker() as session:
+        repository = UserRepository(session)
+        await repository.update_password_hash(uuid.uuid4(), "x")
+        users = await repository.list_users()
+
+    assert users == []
+
+
+async def test_unhealthy_replica_is_skipped(session_maker, sqlite_engine, tmp_path, monkeypatch):
+    await add_user(sqlite_engine, make_user("primary@example.com", "9000000001"))
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    monkeypatch.setattr(RoutingSession, "replicas", ReplicaSet([broken]))
+    await RoutingSession.replicas.check()
+
+    async with session_maker() as session:
+        users = await UserRepository(session).list_users()
+
+    assert RoutingSession.replicas.healthy == []
+    assert [user["email"] for user in users] == ["primary@example.com"]
+    await broken.dispose()
+
+
+async def test_replica_that_hangs_on_connect_is_marked_unhealthy():
+    async def hang():
+        await asyncio.sleep(3600)
+
+    hanging = create_async_engine("sqlite+aiosqlite://", async_creator=hang)
+    replicas = ReplicaSet([hanging], check_timeout=0.05)
+
+    await asyncio.wait_for(replicas.check(), 5)
+
+    assert replicas.healthy == []
+    await hanging.dispose()
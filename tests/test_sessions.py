@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from app.auth.services import UserService
+from app.auth.utils import Hasher
+from tests.helpers import CREDENTIALS, cookie_header, log_in, register
+
+pytestmark = pytest.mark.anyio
+
+
+def access_token(expires_in: int) -> str:
+    return Hasher.encode_token({
+        "sub": CREDENTIALS["email"], "role": "base_user", "jti": Hasher.generate_unique_string(16),
+        "exp": int(time.time()) + expires_in,
+    })
+
+
+async def test_logout_consumes_the_refresh_token(client):
+    await register(client)
+    cookies = await log_in(client)
+
+    response = await client.post("/auth/logout", headers=cookie_header(cookies))
+    assert response.status_code == 200
+    client.cookies.clear()
+
+    response = await client.get("/auth/me", headers=cookie_header(cookies))
+    assert response.status_code == 401
+    assert not response.cookies.get("ACCESS_TOKEN")
+    response = await client.post("/auth/refresh", headers=cookie_header({"REFRESH_TOKEN": cookies["REFRESH_TOKEN"]}))
+    assert response.status_code == 401
+
+
+async def test_expired_access_token_is_refreshed(client):
+    await register(client)
+    cookies = await log_in(client)
+
+    response = await client.get("/auth/me", headers=cookie_header({**cookies, "ACCESS_TOKEN": access_token(-60)}))
+
+    assert response.status_code == 200
+    assert response.cookies.get("ACCESS_TOKEN")
+
+
+async def test_revoked_access_token_is_not_refreshed(client):
+    await register(client)
+    revoked = await log_in(client)
+    other_session = await log_in(client)
+    await client.post("/auth/logout", headers=cookie_header(revoked))
+    client.cookies.clear()
+
+    # The revoked token paired with a live refresh token from another session.
+    cookies = {"ACCESS_TOKEN": revoked["ACCESS_TOKEN"], "REFRESH_TOKEN": other_session["REFRESH_TOKEN"]}
+    response = await client.get("/auth/me", headers=cookie_header(cookies))
+
+    assert response.status_code == 401
+    assert "set-cookie" not in response.headers
+
+
+async def test_failed_refresh_passes_the_request_through(client, monkeypatch):
+    await register(client)
+    cookies = await log_in(client)
+
+    async def database_down(self, refresh_token):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(UserService, "rotate_tokens", database_down)
+    # Inside the refresh window, but still valid.
+    response = await client.get("/auth/me", headers=cookie_header({**cookies, "ACCESS_TOKEN": access_token(5)}))
+
+    assert response.status_code == 200
+    assert "set-cookie" not in response.headers
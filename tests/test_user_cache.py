@@ -0,0 +1,68 @@
+import uuid
+
+import pytest
+
+from app.auth.cache import TTLCache
+from app.auth.models import User, UserRole
+from app.auth.services import UserService
+from app.auth.utils import build_crypt_context
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Passw0rdX"
+
+
+class ProfileRepository:
+    """Stands in for UserRepository, counting profile reads."""
+
+    def __init__(self, user: User):
+        self.user = user
+        self.profile_reads = 0
+
+    async def get_profile_by_email(self, email: str) -> dict | None:
+        self.profile_reads += 1
+        if email.lower() != self.user.email:
+            return None
+        return {
+            "id": self.user.id, "email": self.user.email, "phone_number": self.user.phone_number,
+            "role": self.user.role, "is_active": True, "is_verified": False, "is_superuser": False,
+        }
+
+    async def update_password_hash(self, user_id: uuid.UUID, hashed_password: str) -> None:
+        self.user.hashed_password = hashed_password
+
+
+@pytest.fixture
+def service(monkeypatch) -> UserService:
+    monkeypatch.setattr(UserService, "user_cache", TTLCache())
+    # A higher cost than the test context's, so logging in rehashes the password.
+    user = User(
+        id=uuid.uuid4(), email="user@example.com", phone_number="9000000000", role=UserRole.base_user,
+        hashed_password=build_crypt_context(bcrypt_rounds=5).hash(PASSWORD),
+    )
+    return UserService(ProfileRepository(user))
+
+
+async def test_profiles_are_read_once_and_then_served_from_the_cache(service):
+    first = await service.get_profile("User@example.com")
+    second = await service.get_profile("user@example.com")
+
+    assert first is second
+    assert service.user_db.profile_reads == 1
+    assert service.user_cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+async def test_unknown_users_are_not_cached(service):
+    assert await service.get_profile("nobody@example.com") is None
+    assert await service.get_profile("nobody@example.com") is None
+
+    assert service.user_db.profile_reads == 2
+
+
+async def test_a_password_rehash_invalidates_the_profile(service):
+    await service.get_profile(service.user_db.user.email)
+
+    assert await service.verify(service.user_db.user, PASSWORD)
+
+    await service.get_profile(service.user_db.user.email)
+    assert service.user_db.profile_reads == 2